@@ -1,5 +1,6 @@
 import logging
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.market_agent import market_monitor
@@ -27,7 +28,11 @@ class TradingCoordinator:
             self.execution_agent.user_id = user_id
             self.execution_agent.db_session = db_session
         
-        self.trading_sessions: List[Dict] = []
+        # Bounded so a long-running server doesn't accumulate sessions forever.
+        # sessions_recorded keeps counting past maxlen, so ETags built from it
+        # stay monotonic once the deque is full and len() stops moving.
+        self.trading_sessions: Deque[Dict] = deque(maxlen=10_000)
+        self.sessions_recorded = 0
         self.is_running = False
         
         self._load_models_at_startup()
@@ -112,6 +117,7 @@ class TradingCoordinator:
         }
         
         self.trading_sessions.append(trading_session)
+        self.sessions_recorded += 1
         
         logger.info(f"\n{'='*60}")
         logger.info(f"{self.name}: Trading Cycle Complete")
@@ -303,28 +309,14 @@ class TradingCoordinator:
         return results
     
     async def get_system_status(self) -> Dict:
-        portfolio_info = {}
-        if self.execution_agent.user_id and self.execution_agent.db_session:
-            try:
-                portfolio = await self.execution_agent.get_portfolio_summary()
-                portfolio_info = {
-                    "cash": portfolio["cash"],
-                    "positions_count": portfolio["positions_count"],
-                    "total_value": portfolio["total_value"]
-                }
-            except Exception as e:
-                logger.error(f"Error getting portfolio for status: {e}")
-                portfolio_info = {
-                    "cash": 0,
-                    "positions_count": 0,
-                    "total_value": 0
-                }
-        else:
-            portfolio_info = {
-                "cash": 0,
-                "positions_count": 0,
-                "total_value": 0
-            }
+        # The status probe only reports headline numbers, so use the SQL
+        # valuation instead of rebuilding the per-position summary per poll.
+        valuation = await self.execution_agent.get_portfolio_valuation()
+        portfolio_info = {
+            "cash": valuation["cash"],
+            "positions_count": valuation["positions_count"],
+            "total_value": valuation["total_value"]
+        }
         
         return {
             "is_running": self.is_running,
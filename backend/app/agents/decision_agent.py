@@ -1,6 +1,7 @@
 import logging
+from collections import deque
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -34,7 +35,11 @@ class DecisionMakingAgent:
         self.scaler = StandardScaler()
         self.is_trained = False
         
-        self.decision_history: List[Dict] = []
+        # Bounded history keeps memory flat on long-running servers;
+        # decisions_recorded keeps counting past maxlen so ETags built from
+        # it stay monotonic once the deque is full.
+        self.decision_history: Deque[Dict] = deque(maxlen=10_000)
+        self.decisions_recorded = 0
         self.feedback_data: List[Dict] = []
     
     def set_risk_tolerance(self, risk_tolerance: float):
@@ -177,6 +182,7 @@ class DecisionMakingAgent:
         
         # Store in history
         self.decision_history.append(decision)
+        self.decisions_recorded += 1
         
         logger.info(
             f"{self.name}: {symbol} -> {decision['decision']} "
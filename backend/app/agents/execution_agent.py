@@ -108,6 +108,23 @@ class ExecutionAgent:
                 "positions": []
             }
     
+    async def get_portfolio_valuation(self) -> Dict:
+        """Headline portfolio numbers via one SQL aggregate.
+
+        Used where only cash/total value/position count are reported (e.g.
+        the system status probe), so the full per-position summary isn't
+        rebuilt on every poll.
+        """
+        empty = {"cash": 0, "positions_value": 0, "total_value": 0, "positions_count": 0}
+        if not self.user_id or not self.db_session:
+            return empty
+
+        try:
+            return await portfolio_service.get_portfolio_valuation(self.db_session, self.user_id)
+        except Exception as e:
+            logger.error(f"Error getting portfolio valuation: {e}")
+            return empty
+
     async def execute_decision(
         self,
         decision: Dict,
@@ -384,19 +401,19 @@ class ExecutionAgent:
         start_date: datetime,
         end_date: datetime
     ) -> Dict:
-        start_date_str = start_date.strftime('%Y-%m-%d')
+        # The date column is DATE, so bind native dates; asyncpg rejects
+        # strings for date parameters.
         start_query = select(StockPrice).where(
             StockPrice.symbol == symbol,
-            StockPrice.date >= start_date_str,
+            StockPrice.date >= start_date.date(),
         ).order_by(StockPrice.date.asc()).limit(1)
-        
+
         start_result = await session.execute(start_query)
         start_record = start_result.scalar_one_or_none()
-        
-        end_date_str = end_date.strftime('%Y-%m-%d')
+
         end_query = select(StockPrice).where(
             StockPrice.symbol == symbol,
-            StockPrice.date >= end_date_str,
+            StockPrice.date >= end_date.date(),
         ).order_by(StockPrice.date.asc()).limit(1)
         
         end_result = await session.execute(end_query)
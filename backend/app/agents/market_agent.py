@@ -429,50 +429,49 @@ class MarketMonitoringAgent:
             logger.error(f"{self.name}: Error loading model: {e}")
             return False
     
-    async def predict_price_movement(self, symbol: str, db: AsyncSession) -> Dict:
+    def predict_from_frame(self, symbol: str, df: pd.DataFrame) -> Dict:
+        """Run the prediction kernel on an already-loaded history DataFrame"""
         if not self.is_trained:
             return {
                 "symbol": symbol,
                 "status": "error",
                 "message": "Model not trained yet"
             }
-        
-        df = await self.load_historical_data_from_db(symbol, db)
-        
+
         if df.empty or len(df) < 30:
             return {
                 "symbol": symbol,
                 "status": "error",
                 "message": "Insufficient data"
             }
-        
-        df = self.calculate_technical_indicators(df)
+
+        df = self.calculate_technical_indicators(df.copy())
         df = df.dropna()
-        
+
         if df.empty:
             return {
                 "symbol": symbol,
                 "status": "error",
                 "message": "Error calculating indicators"
             }
-        
+
         latest_features = df[self.feature_columns].iloc[-1:].values
         features_scaled = self.scaler.transform(latest_features)
-        
+
         predicted_change = self.price_model.predict(features_scaled)[0]
-        
+
         current_price = df['Close'].iloc[-1]
         predicted_price = current_price * (1 + predicted_change / 100)
-        
+
         confidence = min(0.95, 0.5 + abs(predicted_change) / 20)
-        
+
         if predicted_change > 1.0:
             direction = "UP"
         elif predicted_change < -1.0:
             direction = "DOWN"
         else:
             direction = "STABLE"
-        
+
         return {
             "symbol": symbol,
             "status": "predicted",
@@ -489,6 +488,58 @@ class MarketMonitoringAgent:
             },
             "timestamp": datetime.now().isoformat()
         }
+
+    async def fetch_histories_bulk(
+        self,
+        db: AsyncSession,
+        symbols: List[str],
+        lookback_days: Optional[int] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Load history for many symbols with one WHERE symbol IN (...) query
+        and group the rows per symbol, instead of one query per symbol.
+        """
+        if not symbols:
+            return {}
+
+        query = select(StockPrice).where(StockPrice.symbol.in_(symbols))
+
+        if lookback_days is not None:
+            cutoff = (datetime.now() - timedelta(days=lookback_days)).date()
+            query = query.where(StockPrice.date >= cutoff)
+
+        query = query.order_by(StockPrice.symbol, StockPrice.date)
+
+        result = await db.execute(query)
+        records = result.scalars().all()
+
+        if not records:
+            return {}
+
+        df = pd.DataFrame([{
+            'Date': record.date,
+            'Open': record.open,
+            'High': record.high,
+            'Low': record.low,
+            'Close': record.close,
+            'Volume': record.volume,
+            'Symbol': record.symbol
+        } for record in records])
+        df['Date'] = pd.to_datetime(df['Date'])
+
+        return {symbol: group for symbol, group in df.groupby('Symbol')}
+
+    async def predict_price_movement(self, symbol: str, db: AsyncSession) -> Dict:
+        if not self.is_trained:
+            return {
+                "symbol": symbol,
+                "status": "error",
+                "message": "Model not trained yet"
+            }
+
+        df = await self.load_historical_data_from_db(symbol, db)
+
+        return self.predict_from_frame(symbol, df)
     
     async def predict_price_movement_from_csv(self, symbol: str, dataset_path: str = None) -> Dict:
         if not self.is_trained:
@@ -511,58 +562,8 @@ class MarketMonitoringAgent:
             }
         
         df = await self.load_historical_data_from_csv(symbol, str(csv_file))
-        
-        if df.empty or len(df) < 30:
-            return {
-                "symbol": symbol,
-                "status": "error",
-                "message": "Insufficient data"
-            }
-        
-        df = self.calculate_technical_indicators(df)
-        df = df.dropna()
-        
-        if df.empty:
-            return {
-                "symbol": symbol,
-                "status": "error",
-                "message": "Error calculating indicators"
-            }
-
-        latest_features = df[self.feature_columns].iloc[-1:].values
-        features_scaled = self.scaler.transform(latest_features)
-
-        predicted_change = self.price_model.predict(features_scaled)[0]
-        
-        current_price = df['Close'].iloc[-1]
-        predicted_price = current_price * (1 + predicted_change / 100)
 
-        confidence = min(0.95, 0.5 + abs(predicted_change) / 20)
-        
-        # Direction
-        if predicted_change > 1.0:
-            direction = "UP"
-        elif predicted_change < -1.0:
-            direction = "DOWN"
-        else:
-            direction = "STABLE"
-        
-        return {
-            "symbol": symbol,
-            "status": "predicted",
-            "current_price": float(current_price),
-            "predicted_change_percent": float(predicted_change),
-            "predicted_price": float(predicted_price),
-            "direction": direction,
-            "confidence": float(confidence),
-            "technical_indicators": {
-                "RSI": float(df['RSI'].iloc[-1]),
-                "MACD": float(df['MACD'].iloc[-1]),
-                "BB_Position": float(df['BB_Position'].iloc[-1]),
-                "Distance_MA20": float(df['Distance_MA20'].iloc[-1])
-            },
-            "timestamp": datetime.now().isoformat()
-        }
+        return self.predict_from_frame(symbol, df)
     
     async def analyze_portfolio(self, symbols: List[str]) -> List[Dict]:
         logger.info(f"{self.name}: Analyzing {len(symbols)} stocks with ML model...")
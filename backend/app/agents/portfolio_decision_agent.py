@@ -1,6 +1,7 @@
 import logging
+from collections import deque
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional
 from datetime import datetime
 from pathlib import Path
 from sklearn.ensemble import GradientBoostingClassifier
@@ -29,7 +30,8 @@ class PortfolioAwareDecisionAgent:
         self.scaler = StandardScaler()
         self.is_trained = False
         
-        self.decision_history: List[Dict] = []
+        self.decision_history: Deque[Dict] = deque(maxlen=10_000)
+        self.decisions_recorded = 0
         self.feedback_data: List[Dict] = []
         
         # Sector mapping for diversification
@@ -277,7 +279,8 @@ class PortfolioAwareDecisionAgent:
             decision['shares'] = shares
         
         self.decision_history.append(decision)
-        
+        self.decisions_recorded += 1
+
         return decision
     
     def analyze_portfolio_health(
@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func, and_
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from pathlib import Path
 import httpx
 import logging
+import numpy as np
 import pandas as pd
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -20,14 +21,49 @@ router = APIRouter()
 
 executor = ThreadPoolExecutor(max_workers=4)
 
+# Columns returned by the hot read endpoints. Selecting these directly yields
+# plain Row mappings and skips ORM instance construction + identity-map overhead.
+STOCK_ROW_COLUMNS = (
+    StockPrice.id,
+    StockPrice.symbol,
+    StockPrice.date,
+    StockPrice.open,
+    StockPrice.high,
+    StockPrice.low,
+    StockPrice.close,
+    StockPrice.volume,
+    StockPrice.after_hours,
+    StockPrice.pre_market,
+    StockPrice.status,
+    StockPrice.created_at,
+    StockPrice.updated_at,
+)
+
+
+def _parse_cursor(before: str) -> date:
+    """Parse a keyset cursor, rejecting malformed values as a client error"""
+    try:
+        return date.fromisoformat(before)
+    except ValueError:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid 'before' cursor: {before!r} (expected YYYY-MM-DD)"
+        )
+
 
 class MassiveAPIClient:
     BASE_URL = "https://api.massive.com/v1"
-    
+
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.client = httpx.AsyncClient(timeout=30.0)
-    
+        # HTTP/2 multiplexes concurrent fetches over one keep-alive
+        # connection, so the TCP+TLS handshake is paid once, not per call.
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
+
     async def get_daily_ohlc(self, symbol: str, date: str) -> dict:
         url = f"{self.BASE_URL}/open-close/{symbol}/{date}"
         params = {
@@ -47,11 +83,26 @@ class MassiveAPIClient:
         await self.client.aclose()
 
 
+# One client for the process: building (and closing) a client per request
+# threw away the pooled connection on every fetch.
+_massive_client: Optional[MassiveAPIClient] = None
+
+
+def get_massive_client() -> MassiveAPIClient:
+    global _massive_client
+    if _massive_client is None:
+        _massive_client = MassiveAPIClient(settings.MASSIVE_API_KEY)
+    return _massive_client
+
+
 async def save_stock_data(db: AsyncSession, stock_data: dict) -> StockPrice:
+    # API dates arrive as "YYYY-MM-DD"; the column is a native DATE
+    record_date = date.fromisoformat(stock_data.get("from"))
+
     # if record already exists
     stmt = select(StockPrice).where(
         StockPrice.symbol == stock_data.get("symbol"),
-        StockPrice.date == stock_data.get("from")
+        StockPrice.date == record_date
     )
     result = await db.execute(stmt)
     existing = result.scalar_one_or_none()
@@ -73,7 +124,7 @@ async def save_stock_data(db: AsyncSession, stock_data: dict) -> StockPrice:
     else:
         stock = StockPrice(
             symbol=stock_data.get("symbol"),
-            date=stock_data.get("from"),
+            date=record_date,
             open=stock_data.get("open"),
             high=stock_data.get("high"),
             low=stock_data.get("low"),
@@ -111,19 +162,34 @@ async def get_latest_stock_data(
 async def get_stock_history(
     symbol: str,
     limit: int = 30,
+    before: Optional[str] = Query(None, description="Keyset cursor: only return rows with date < before (YYYY-MM-DD)"),
     db: AsyncSession = Depends(get_db)
 ):
-    stmt = select(StockPrice).where(
+    stmt = select(*STOCK_ROW_COLUMNS).where(
         StockPrice.symbol == symbol.upper()
-    ).order_by(desc(StockPrice.date)).limit(limit)
-    
+    )
+
+    # Keyset pagination: index seek straight to the page instead of OFFSET scan+discard
+    if before:
+        stmt = stmt.where(StockPrice.date < _parse_cursor(before))
+
+    stmt = stmt.order_by(desc(StockPrice.date)).limit(limit)
+
     result = await db.execute(stmt)
-    stock_data = result.scalars().all()
-    
-    if not stock_data:
+    rows = result.mappings().all()
+
+    # 404 only means "unknown symbol"; a cursor paging past the end is the
+    # normal loop terminator and gets an empty page with no next cursor.
+    if not rows and not before:
         raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
-    
-    return [data.to_dict() for data in stock_data]
+
+    return {
+        "symbol": symbol.upper(),
+        "count": len(rows),
+        "history": list(rows),
+        # A short page means the history is exhausted
+        "next_before": rows[-1]["date"].isoformat() if len(rows) == limit else None
+    }
 
 
 @router.get("/stocks/latest")
@@ -137,16 +203,15 @@ async def get_all_latest_stocks(
         func.max(StockPrice.date).label('max_date')
     ).group_by(StockPrice.symbol).subquery()
     
-    stmt = select(StockPrice).join(
+    stmt = select(*STOCK_ROW_COLUMNS).join(
         subquery,
-        (StockPrice.symbol == subquery.c.symbol) & 
+        (StockPrice.symbol == subquery.c.symbol) &
         (StockPrice.date == subquery.c.max_date)
     )
-    
+
     result = await db.execute(stmt)
-    stocks = result.scalars().all()
-    
-    return [stock.to_dict() for stock in stocks]
+
+    return [dict(row) for row in result.mappings().all()]
 
 
 @router.post("/stock/{symbol}/fetch")
@@ -162,17 +227,51 @@ async def fetch_and_save_stock_data(
         # default to yesterday (most recent complete trading day)
         date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
     
-    client = MassiveAPIClient(settings.MASSIVE_API_KEY)
-    
-    try:
-        stock_data = await client.get_daily_ohlc(symbol.upper(), date)
+    client = get_massive_client()
+
+    stock_data = await client.get_daily_ohlc(symbol.upper(), date)
+    stock = await save_stock_data(db, stock_data)
+    return {
+        "message": f"Successfully fetched and saved data for {symbol}",
+        "data": stock.to_dict()
+    }
+
+
+@router.post("/stocks/fetch-batch")
+async def fetch_and_save_stock_batch(
+    symbols: List[str],
+    date: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    if not hasattr(settings, 'MASSIVE_API_KEY') or not settings.MASSIVE_API_KEY:
+        raise HTTPException(status_code=500, detail="MASSIVE_API_KEY not configured")
+
+    if not date:
+        date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    client = get_massive_client()
+
+    # All fetches go out in flight together and multiplex over the shared
+    # connection: the batch costs one round-trip, not one per symbol.
+    results = await asyncio.gather(
+        *(client.get_daily_ohlc(s.upper(), date) for s in symbols),
+        return_exceptions=True,
+    )
+
+    saved = []
+    errors = []
+    for symbol, stock_data in zip(symbols, results):
+        if isinstance(stock_data, Exception):
+            errors.append({"symbol": symbol.upper(), "error": str(stock_data)})
+            continue
         stock = await save_stock_data(db, stock_data)
-        return {
-            "message": f"Successfully fetched and saved data for {symbol}",
-            "data": stock.to_dict()
-        }
-    finally:
-        await client.close()
+        saved.append(stock.to_dict())
+
+    return {
+        "message": f"Fetched {len(saved)}/{len(symbols)} symbols for {date}",
+        "data": saved,
+        "errors": errors
+    }
 
 
 @router.get("/stock/csv/available")
@@ -343,29 +442,38 @@ async def get_all_stocks_data(
             for s in stocks:
                 s['source'] = 'csv'
 
-        if search:
-            search_upper = search.upper()
-            stocks = [s for s in stocks if search_upper in s['symbol'].upper()]
-
-        if min_price is not None:
-            stocks = [s for s in stocks if s['close'] >= min_price]
-        if max_price is not None:
-            stocks = [s for s in stocks if s['close'] <= max_price]
-        if min_change_pct is not None:
-            stocks = [s for s in stocks if s['change_pct'] >= min_change_pct]
-        if max_change_pct is not None:
-            stocks = [s for s in stocks if s['change_pct'] <= max_change_pct]
-
-        reverse = sort_order.lower() == 'desc'
-        if sort_by in ['symbol', 'close', 'change', 'change_pct', 'volume', 'week_52_high', 'week_52_low']:
-            stocks = sorted(stocks, key=lambda x: x.get(sort_by, 0) or 0, reverse=reverse)
-        
-        total_count = len(stocks)
+        # Filter/sort/paginate with one NumPy boolean mask over a DataFrame
+        # instead of four sequential list comprehensions, each of which would
+        # allocate a new list and re-compare every row in Python.
+        df = pd.DataFrame(stocks)
+        total_count = 0
+        paginated_stocks = []
+
+        if not df.empty:
+            mask = np.ones(len(df), dtype=bool)
+
+            if search:
+                mask &= df['symbol'].str.upper().str.contains(search.upper(), regex=False).values
+            if min_price is not None:
+                mask &= df['close'].values >= min_price
+            if max_price is not None:
+                mask &= df['close'].values <= max_price
+            if min_change_pct is not None:
+                mask &= df['change_pct'].values >= min_change_pct
+            if max_change_pct is not None:
+                mask &= df['change_pct'].values <= max_change_pct
+
+            df = df[mask]
+
+            reverse = sort_order.lower() == 'desc'
+            if sort_by in ['symbol', 'close', 'change', 'change_pct', 'volume', 'week_52_high', 'week_52_low']:
+                df = df.sort_values(sort_by, ascending=not reverse)
+
+            total_count = len(df)
+            start_idx = (page - 1) * per_page
+            end_idx = start_idx + per_page
+            paginated_stocks = df.iloc[start_idx:end_idx].to_dict('records')
 
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_stocks = stocks[start_idx:end_idx]
-        
         return {
             'stocks': paginated_stocks,
             'source': source,
@@ -385,22 +493,40 @@ async def get_all_stocks_data(
 async def get_stock_csv_data(
     symbol: str,
     days: int = Query(365, ge=1, le=10000, description="Number of days of history"),
+    before: Optional[str] = Query(None, description="Keyset cursor: only return rows with date < before (YYYY-MM-DD)"),
     db: AsyncSession = Depends(get_db)
 ):
     symbol = symbol.upper()
-    
+
     stmt = select(StockPrice).where(
         StockPrice.symbol == symbol
-    ).order_by(desc(StockPrice.date)).limit(days)
-    
+    )
+
+    # Keyset pagination: seek directly to the page via the (symbol, date) index
+    if before:
+        stmt = stmt.where(StockPrice.date < _parse_cursor(before))
+
+    stmt = stmt.order_by(desc(StockPrice.date)).limit(days)
+
     result = await db.execute(stmt)
     db_records = result.scalars().all()
-    
+
+    # A cursor paging past the end terminates the loop with an empty page;
+    # falling through to the CSV fallback would restart it from scratch.
+    if before and not db_records:
+        return {
+            'symbol': symbol,
+            'source': 'database',
+            'total_records': 0,
+            'history': [],
+            'next_before': None
+        }
+
     if db_records and len(db_records) > 0:
         records = [r.to_dict() for r in reversed(db_records)]  # Oldest first
         latest = db_records[0]  # Most recent
         close_price = float(latest.close)
-        
+
         if len(db_records) > 1:
             prev_close = float(db_records[1].close)
             change = close_price - prev_close
@@ -408,7 +534,7 @@ async def get_stock_csv_data(
         else:
             change = 0
             change_pct = 0
-        
+
         return {
             'symbol': symbol,
             'source': 'database',
@@ -416,7 +542,9 @@ async def get_stock_csv_data(
             'change': round(change, 2),
             'change_pct': round(change_pct, 2),
             'total_records': len(records),
-            'history': records
+            'history': records,
+            # A short page means the history is exhausted
+            'next_before': db_records[-1].date.isoformat() if len(db_records) == days else None
         }
 
     dataset_path = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks"
@@ -1,22 +1,73 @@
+import asyncio
+import heapq
 import logging
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.portfolio_decision_agent import portfolio_decision_agent
 from app.agents.market_agent import market_monitor
 from app.agents.execution_agent import execution_agent
 from app.schemas.portfolio import AnalyzeRequest, DiscoverRequest, UserPortfolio
-from app.core.database import get_db
+from app.core.database import get_db, async_session_maker
 from app.models.stock import StockPrice
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["portfolio"])
 
+# Resolved once at import time; both hot endpoints reuse it.
+DATASET_DIR = Path(__file__).resolve().parent.parent.parent / "dataset_of_stocks" / "stocks"
+
+# In-process cache for the SELECT DISTINCT symbol scan, which /analyze and
+# /discover would otherwise repeat on every request.
+_symbols_cache = {"ts": 0.0, "value": None}
+_symbols_cache_lock = asyncio.Lock()
+
+# Directory-scan cache for the CSV universe, invalidated by the directory's
+# mtime so new files still show up without a per-request stat-walk.
+_csv_dir_cache: Dict[Path, tuple] = {}
+
+
+def list_csv_symbols(dataset_dir: Path) -> List[str]:
+    """Return the symbols with a CSV file, re-scanning only when the dir changes"""
+    try:
+        mtime_ns = dataset_dir.stat().st_mtime_ns
+    except OSError:
+        return []
+    cached = _csv_dir_cache.get(dataset_dir)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    # iterdir + endswith avoids glob's fnmatch overhead on large directories
+    symbols = [f.name[:-4] for f in dataset_dir.iterdir() if f.name.endswith('.csv')]
+    _csv_dir_cache[dataset_dir] = (mtime_ns, symbols)
+    return symbols
+
+
+async def get_all_db_symbols(db: AsyncSession, ttl: float = 60.0) -> List[str]:
+    """Return all symbols present in stock_prices, cached for `ttl` seconds"""
+    if time.monotonic() - _symbols_cache["ts"] < ttl and _symbols_cache["value"] is not None:
+        return _symbols_cache["value"]
+
+    # Lock so a burst of requests after expiry runs the scan only once
+    async with _symbols_cache_lock:
+        if time.monotonic() - _symbols_cache["ts"] < ttl and _symbols_cache["value"] is not None:
+            return _symbols_cache["value"]
+
+        result = await db.execute(select(distinct(StockPrice.symbol)))
+        symbols = [row[0] for row in result.fetchall()]
+        _symbols_cache["value"] = symbols
+        _symbols_cache["ts"] = time.monotonic()
+        return symbols
+
 
 async def get_current_price_from_db(db: AsyncSession, symbol: str) -> Optional[float]:
     """Get the latest price for a symbol from database"""
@@ -30,11 +81,57 @@ async def get_current_price_from_db(db: AsyncSession, symbol: str) -> Optional[f
     return None
 
 
+async def get_current_prices_bulk(db: AsyncSession, symbols: List[str]) -> Dict[str, float]:
+    """Get the latest close per symbol in one DISTINCT ON query instead of N round trips"""
+    if not symbols:
+        return {}
+    stmt = (
+        select(StockPrice.symbol, StockPrice.close)
+        .where(StockPrice.symbol.in_(symbols))
+        .distinct(StockPrice.symbol)
+        .order_by(StockPrice.symbol, desc(StockPrice.date))
+    )
+    result = await db.execute(stmt)
+    return {row.symbol: float(row.close) for row in result.all()}
+
+
+@lru_cache(maxsize=4096)
+def _tail_close(path_str: str, mtime_ns: int) -> Optional[float]:
+    """Read the last close from a CSV by seeking to its tail.
+
+    Reads the header line for the close column index, then only the last
+    ~4KB of the file, so a multi-year bar file costs a couple of reads
+    instead of a full parse. Cached per (path, mtime) so repeated lookups
+    within and across requests are free until the file changes.
+    """
+    try:
+        with open(path_str, 'rb') as f:
+            header = f.readline()
+            columns = [c.strip().lower() for c in header.decode('utf-8', 'replace').split(',')]
+            if 'close' not in columns:
+                return None
+            close_idx = columns.index('close')
+
+            size = f.seek(0, 2)
+            f.seek(max(len(header), size - 4096))
+            lines = [line for line in f.read().split(b'\n') if line.strip()]
+            if not lines or lines[-1] == header.strip():
+                return None
+            fields = lines[-1].decode('utf-8', 'replace').split(',')
+            return float(fields[close_idx])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
 async def get_current_price_from_csv(symbol: str, dataset_dir: Path) -> Optional[float]:
     """Fallback: Get price from CSV file"""
     csv_path = dataset_dir / f"{symbol}.csv"
     if csv_path.exists():
-        import pandas as pd
+        price = _tail_close(str(csv_path), csv_path.stat().st_mtime_ns)
+        if price is not None:
+            return price
+        # Tail parse handles plain comma-separated rows; anything odd
+        # (quoted fields, missing close column) falls back to pandas.
         df = pd.read_csv(csv_path)
         if not df.empty:
             close_col = 'close' if 'close' in df.columns else 'Close'
@@ -50,20 +147,18 @@ async def analyze_portfolio(
 ):
     try:
         portfolio = request.portfolio
-        
-        dataset_dir = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks"
-        current_prices = {}
-        
-        # Priority: Database first, CSV as fallback
+
+        # One set probe per symbol instead of a stat() syscall per position.
+        csv_symbols_set = set(list_csv_symbols(DATASET_DIR))
+
+        # Priority: Database first (one batched query for all positions), CSV as fallback
+        current_prices = await get_current_prices_bulk(db, list(portfolio.positions.keys()))
+
         for symbol in portfolio.positions.keys():
-            # Try database first
-            price = await get_current_price_from_db(db, symbol)
-            if price is not None:
-                current_prices[symbol] = price
-                logger.info(f"Got price for {symbol} from database: ${price:.2f}")
-            else:
-                # Fallback to CSV
-                price = await get_current_price_from_csv(symbol, dataset_dir)
+            if symbol not in current_prices:
+                price = None
+                if symbol in csv_symbols_set:
+                    price = await get_current_price_from_csv(symbol, DATASET_DIR)
                 if price is not None:
                     current_prices[symbol] = price
                     logger.info(f"Got price for {symbol} from CSV: ${price:.2f}")
@@ -75,160 +170,195 @@ async def analyze_portfolio(
             current_prices,
             portfolio.cash
         )
-        
-        # Per-position recommendations
-        position_recommendations = []
-        
-        for symbol, position in portfolio.positions.items():
-            # Check if we have data in DB or CSV
-            has_db_data = await get_current_price_from_db(db, symbol) is not None
-            csv_path = dataset_dir / f"{symbol}.csv"
-            has_csv_data = csv_path.exists()
-            
-            if not has_db_data and not has_csv_data:
-                position_recommendations.append({
-                    'symbol': symbol,
-                    'action': 'HOLD',
-                    'reason': 'No data available',
-                    'confidence': 0.0
-                })
-                continue
-            
-            try:
+
+        # Position arithmetic vectorized across the whole portfolio: one NumPy
+        # pass over aligned arrays instead of scalar math per gather task.
+        pos_symbols = list(portfolio.positions.keys())
+        avg_arr = np.fromiter(
+            (portfolio.positions[s]['avg_price'] for s in pos_symbols),
+            dtype=np.float64, count=len(pos_symbols)
+        )
+        shares_arr = np.fromiter(
+            (portfolio.positions[s]['shares'] for s in pos_symbols),
+            dtype=np.float64, count=len(pos_symbols)
+        )
+        cur_arr = np.array(
+            [current_prices.get(s, a) for s, a in zip(pos_symbols, avg_arr)],
+            dtype=np.float64
+        )
+        return_pcts = {s: float(v) for s, v in zip(pos_symbols, (cur_arr - avg_arr) / avg_arr * 100.0)}
+        position_values = {s: float(v) for s, v in zip(pos_symbols, shares_arr * cur_arr)}
+
+
+        # One batched query pulls the historical bars for every position the
+        # database covers; the per-symbol tasks then run the prediction kernel
+        # on their slice without touching the database again.
+        histories = await market_monitor.fetch_histories_bulk(
+            db, list(portfolio.positions.keys())
+        )
+
+        # Per-position recommendations, fanned out with asyncio.gather so each
+        # symbol's DB + model latency overlaps instead of adding up. The
+        # semaphore keeps the fan-out below the connection pool size.
+        prediction_sem = asyncio.Semaphore(8)
+
+        async def analyze_position(symbol: str, position: Dict) -> Dict:
+            async with prediction_sem:
+                history = histories.get(symbol)
+                has_db_data = history is not None
+                has_csv_data = symbol in csv_symbols_set
+
+                if not has_db_data and not has_csv_data:
+                    return {
+                        'symbol': symbol,
+                        'action': 'HOLD',
+                        'reason': 'No data available',
+                        'confidence': 0.0
+                    }
+
                 # Use database data if available, otherwise CSV
                 if has_db_data:
-                    prediction = await market_monitor.predict_price_movement_from_db(
-                        symbol,
-                        db
-                    )
+                    prediction = market_monitor.predict_from_frame(symbol, history)
                 else:
                     prediction = await market_monitor.predict_price_movement_from_csv(
                         symbol,
-                        str(csv_path)
+                        str(DATASET_DIR / f"{symbol}.csv")
                     )
-                
-                decision = portfolio_decision_agent.make_decision_with_portfolio(
-                    prediction,
-                    portfolio.positions,
-                    portfolio.cash,
-                    current_prices
-                )
-                
-                # Add position context
-                current_price = current_prices.get(symbol, position['avg_price'])
-                return_pct = ((current_price - position['avg_price']) / position['avg_price']) * 100
-                
-                # Get technical indicators from prediction
-                tech_indicators = prediction.get('technical_indicators', {})
-                
-                position_recommendations.append({
-                    'symbol': symbol,
-                    'action': decision['action'],
-                    'reason': decision['reason'],
-                    'confidence': decision['confidence'],
-                    'shares': decision.get('shares', 0),
-                    'current_return': return_pct,
-                    'current_price': current_price,
-                    'avg_price': position['avg_price'],
-                    'position_value': position['shares'] * current_price,
-                    'position_shares': position['shares'],
-                    'predicted_change': prediction.get('predicted_change_percent', 0),
-                    'predicted_price': prediction.get('predicted_price', current_price),
-                    'direction': prediction.get('direction', 'STABLE'),
-                    'technical_indicators': tech_indicators,
-                    'data_source': 'database' if has_db_data else 'csv'
-                })
-                
-            except Exception as e:
-                logger.error(f"Error analyzing {symbol}: {e}")
+
+            decision = portfolio_decision_agent.make_decision_with_portfolio(
+                prediction,
+                portfolio.positions,
+                portfolio.cash,
+                current_prices
+            )
+
+            # Add position context (return/value precomputed in one pass above)
+            current_price = current_prices.get(symbol, position['avg_price'])
+
+            return {
+                'symbol': symbol,
+                'action': decision['action'],
+                'reason': decision['reason'],
+                'confidence': decision['confidence'],
+                'shares': decision.get('shares', 0),
+                'current_return': return_pcts[symbol],
+                'current_price': current_price,
+                'avg_price': position['avg_price'],
+                'position_value': position_values[symbol],
+                'position_shares': position['shares'],
+                'predicted_change': prediction.get('predicted_change_percent', 0),
+                'predicted_price': prediction.get('predicted_price', current_price),
+                'direction': prediction.get('direction', 'STABLE'),
+                'technical_indicators': prediction.get('technical_indicators', {}),
+                'data_source': 'database' if has_db_data else 'csv'
+            }
+
+        position_results = await asyncio.gather(
+            *(analyze_position(symbol, position) for symbol, position in portfolio.positions.items()),
+            return_exceptions=True
+        )
+
+        position_recommendations = []
+        for symbol, res in zip(portfolio.positions.keys(), position_results):
+            if isinstance(res, Exception):
+                logger.error(f"Error analyzing {symbol}: {res}")
                 position_recommendations.append({
                     'symbol': symbol,
                     'action': 'HOLD',
-                    'reason': f'Analysis error: {str(e)}',
+                    'reason': f'Analysis error: {str(res)}',
                     'confidence': 0.0
                 })
+            else:
+                position_recommendations.append(res)
         
         # analyze new opportunities if requested
         new_opportunities = []
         if request.analyze_new_opportunities:
             # Get symbols from database that are not in portfolio
-            from sqlalchemy import distinct
-            stmt = select(distinct(StockPrice.symbol))
-            result = await db.execute(stmt)
-            db_symbols = [row[0] for row in result.fetchall()]
+            db_symbols = await get_all_db_symbols(db)
             
             # Also check CSV files
-            csv_files = list(dataset_dir.glob("*.csv"))
-            csv_symbols = [f.stem for f in csv_files]
-            
+            csv_symbols = list_csv_symbols(DATASET_DIR)
+
             # Combine and exclude portfolio symbols
             all_symbols = list(set(db_symbols + csv_symbols) - set(portfolio.positions.keys()))
             sample_symbols = all_symbols[:10]
-            
-            for symbol in sample_symbols:
-                try:
-                    # Check if in database
-                    has_db_data = symbol in db_symbols
-                    
+
+            # Batch-load the DB-covered candidates in one query as well.
+            histories.update(await market_monitor.fetch_histories_bulk(
+                db, [s for s in sample_symbols if s in db_symbols]
+            ))
+
+            async def analyze_opportunity(symbol: str) -> Optional[Dict]:
+                async with prediction_sem:
+                    history = histories.get(symbol)
+                    has_db_data = history is not None
+
                     if has_db_data:
-                        prediction = await market_monitor.predict_price_movement_from_db(
-                            symbol,
-                            db
-                        )
+                        prediction = market_monitor.predict_from_frame(symbol, history)
                     else:
-                        csv_path = dataset_dir / f"{symbol}.csv"
+                        csv_path = DATASET_DIR / f"{symbol}.csv"
                         prediction = await market_monitor.predict_price_movement_from_csv(
                             symbol,
                             str(csv_path)
                         )
-                    
-                    decision = portfolio_decision_agent.make_decision_with_portfolio(
-                        prediction,
-                        portfolio.positions,
-                        portfolio.cash,
-                        current_prices
-                    )
-                    
-                    if decision['action'] == 'BUY' and decision['confidence'] > 0.5:
-                        new_opportunities.append({
-                            'symbol': symbol,
-                            'predicted_change': prediction.get('predicted_change_percent', 0),
-                            'confidence': decision['confidence'],
-                            'reason': decision['reason'],
-                            'recommended_shares': decision.get('shares', 0),
-                            'current_price': prediction.get('current_price', 0),
-                            'predicted_price': prediction.get('predicted_price', 0),
-                            'direction': prediction.get('direction', 'STABLE'),
-                            'technical_indicators': prediction.get('technical_indicators', {}),
-                            'data_source': 'database' if has_db_data else 'csv'
-                        })
-                    # Also add HOLD opportunities with high predicted change
-                    elif prediction.get('predicted_change_percent', 0) > 2 and decision['confidence'] > 0.5:
-                        new_opportunities.append({
-                            'symbol': symbol,
-                            'predicted_change': prediction.get('predicted_change_percent', 0),
-                            'confidence': decision['confidence'],
-                            'reason': f"Potential opportunity: {prediction.get('predicted_change_percent', 0):.1f}% predicted",
-                            'recommended_shares': 0,
-                            'current_price': prediction.get('current_price', 0),
-                            'predicted_price': prediction.get('predicted_price', 0),
-                            'direction': prediction.get('direction', 'STABLE'),
-                            'technical_indicators': prediction.get('technical_indicators', {}),
-                            'data_source': 'database' if has_db_data else 'csv'
-                        })
-                
-                except Exception as e:
-                    logger.error(f"Error analyzing new opportunity {symbol}: {e}")
+
+                decision = portfolio_decision_agent.make_decision_with_portfolio(
+                    prediction,
+                    portfolio.positions,
+                    portfolio.cash,
+                    current_prices
+                )
+
+                if decision['action'] == 'BUY' and decision['confidence'] > 0.5:
+                    return {
+                        'symbol': symbol,
+                        'predicted_change': prediction.get('predicted_change_percent', 0),
+                        'confidence': decision['confidence'],
+                        'reason': decision['reason'],
+                        'recommended_shares': decision.get('shares', 0),
+                        'current_price': prediction.get('current_price', 0),
+                        'predicted_price': prediction.get('predicted_price', 0),
+                        'direction': prediction.get('direction', 'STABLE'),
+                        'technical_indicators': prediction.get('technical_indicators', {}),
+                        'data_source': 'database' if has_db_data else 'csv'
+                    }
+                # Also add HOLD opportunities with high predicted change
+                elif prediction.get('predicted_change_percent', 0) > 2 and decision['confidence'] > 0.5:
+                    return {
+                        'symbol': symbol,
+                        'predicted_change': prediction.get('predicted_change_percent', 0),
+                        'confidence': decision['confidence'],
+                        'reason': f"Potential opportunity: {prediction.get('predicted_change_percent', 0):.1f}% predicted",
+                        'recommended_shares': 0,
+                        'current_price': prediction.get('current_price', 0),
+                        'predicted_price': prediction.get('predicted_price', 0),
+                        'direction': prediction.get('direction', 'STABLE'),
+                        'technical_indicators': prediction.get('technical_indicators', {}),
+                        'data_source': 'database' if has_db_data else 'csv'
+                    }
+                return None
+
+            opportunity_results = await asyncio.gather(
+                *(analyze_opportunity(symbol) for symbol in sample_symbols),
+                return_exceptions=True
+            )
+
+            for symbol, res in zip(sample_symbols, opportunity_results):
+                if isinstance(res, Exception):
+                    logger.error(f"Error analyzing new opportunity {symbol}: {res}")
+                elif res is not None:
+                    new_opportunities.append(res)
         
         return {
             'status': 'success',
             'portfolio_health': health,
             'position_recommendations': position_recommendations,
-            'new_opportunities': sorted(
+            'new_opportunities': heapq.nlargest(
+                5,  # Top 5 opportunities without sorting the whole list
                 new_opportunities,
-                key=lambda x: x['confidence'],
-                reverse=True
-            )[:5]  # Top 5 opportunities
+                key=lambda x: x['confidence']
+            )
         }
         
     except Exception as e:
@@ -242,17 +372,11 @@ async def discover_similar_stocks(
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        dataset_dir = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks"
-        
         # Get symbols from database first
-        from sqlalchemy import distinct
-        stmt = select(distinct(StockPrice.symbol))
-        result = await db.execute(stmt)
-        db_symbols = [row[0] for row in result.fetchall()]
+        db_symbols = await get_all_db_symbols(db)
         
         # Also check CSV files for fallback
-        csv_files = list(dataset_dir.glob("*.csv"))
-        csv_symbols = [f.stem for f in csv_files]
+        csv_symbols = list_csv_symbols(DATASET_DIR)
         
         # Use DB symbols primarily, CSV as fallback
         all_symbols = list(set(db_symbols + csv_symbols))
@@ -260,43 +384,53 @@ async def discover_similar_stocks(
         similar_stocks = await market_monitor.find_similar_to_portfolio(
             request.portfolio_symbols,
             all_symbols,
-            dataset_dir,
+            DATASET_DIR,
             top_n=request.top_n
         )
         
-        # Enrich with predictions
-        enriched_recommendations = []
-        
-        for stock in similar_stocks:
+        # Enrich with predictions, fanned out the same way as /analyze: each
+        # task gets its own session and the semaphore bounds DB pool pressure.
+        prediction_sem = asyncio.Semaphore(8)
+
+        async def enrich_stock(stock: Dict) -> Dict:
             symbol = stock['symbol']
-            
-            try:
+            async with prediction_sem:
                 # Try database first
                 if symbol in db_symbols:
-                    prediction = await market_monitor.predict_price_movement_from_db(
-                        symbol,
-                        db
-                    )
+                    async with async_session_maker() as task_db:
+                        prediction = await market_monitor.predict_price_movement_from_db(
+                            symbol,
+                            task_db
+                        )
                     data_source = 'database'
                 else:
-                    csv_path = dataset_dir / f"{symbol}.csv"
+                    csv_path = DATASET_DIR / f"{symbol}.csv"
                     prediction = await market_monitor.predict_price_movement_from_csv(
                         symbol,
                         str(csv_path)
                     )
                     data_source = 'csv'
-                
-                enriched_recommendations.append({
-                    **stock,
-                    'predicted_change': prediction.get('predicted_change_percent', 0),
-                    'prediction_confidence': prediction.get('confidence', 0),
-                    'direction': prediction.get('direction', 'STABLE'),
-                    'data_source': data_source
-                })
-                
-            except Exception as e:
-                logger.error(f"Error getting prediction for {symbol}: {e}")
+
+            return {
+                **stock,
+                'predicted_change': prediction.get('predicted_change_percent', 0),
+                'prediction_confidence': prediction.get('confidence', 0),
+                'direction': prediction.get('direction', 'STABLE'),
+                'data_source': data_source
+            }
+
+        enrichment_results = await asyncio.gather(
+            *(enrich_stock(stock) for stock in similar_stocks),
+            return_exceptions=True
+        )
+
+        enriched_recommendations = []
+        for stock, res in zip(similar_stocks, enrichment_results):
+            if isinstance(res, Exception):
+                logger.error(f"Error getting prediction for {stock['symbol']}: {res}")
                 enriched_recommendations.append(stock)
+            else:
+                enriched_recommendations.append(res)
         
         return {
             'status': 'success',
@@ -1,15 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import itertools
+import time
+from typing import Dict, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.trading import TrainingRequest, TradingCycleRequest, SystemStatusResponse, RiskSettingsRequest
 from app.core.database import get_db
 from app.agents.coordinator import trading_coordinator, TradingCoordinator
-from app.api.user_api import get_current_user
+from app.api.user_api import get_current_user, make_etag
 from app.models.user import User
 
 
 router = APIRouter()
 
+# Per-user coordinator cache: constructing a TradingCoordinator reloads the
+# agent models from disk, which a UI polling /status would otherwise pay on
+# every request. Sessions are per-request, so the cached instance is rebound
+# to the caller's session on reuse.
+_COORDINATOR_TTL = 30.0
+_coordinator_cache: Dict[int, Tuple[float, TradingCoordinator]] = {}
+_coordinator_lock = asyncio.Lock()
+
+
+async def get_user_coordinator(user_id: int, session: AsyncSession) -> TradingCoordinator:
+    """Return a cached coordinator for this user, rebound to the given session"""
+    now = time.monotonic()
+    cached = _coordinator_cache.get(user_id)
+    if cached is not None and now - cached[0] < _COORDINATOR_TTL:
+        coordinator = cached[1]
+        coordinator.execution_agent.user_id = user_id
+        coordinator.execution_agent.db_session = session
+        return coordinator
+
+    async with _coordinator_lock:
+        cached = _coordinator_cache.get(user_id)
+        if cached is not None and now - cached[0] < _COORDINATOR_TTL:
+            coordinator = cached[1]
+        else:
+            coordinator = TradingCoordinator(user_id=user_id, db_session=session)
+            _coordinator_cache[user_id] = (time.monotonic(), coordinator)
+        coordinator.execution_agent.user_id = user_id
+        coordinator.execution_agent.db_session = session
+        return coordinator
+
 
 
 @router.post("/train")
@@ -38,8 +73,7 @@ async def run_trading_cycle(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        # Create user-specific coordinator
-        user_coordinator = TradingCoordinator(user_id=current_user.id, db_session=session)
+        user_coordinator = await get_user_coordinator(current_user.id, session)
         
         result = await user_coordinator.run_trading_cycle(
             session,
@@ -59,7 +93,7 @@ async def get_system_status(
 ):
     """Get overall trading system status for authenticated user"""
     try:
-        user_coordinator = TradingCoordinator(user_id=current_user.id, db_session=session)
+        user_coordinator = await get_user_coordinator(current_user.id, session)
         await user_coordinator.execution_agent.load_trade_stats()
         status = await user_coordinator.get_system_status()
         return {
@@ -71,9 +105,22 @@ async def get_system_status(
 
 
 @router.get("/sessions")
-async def get_trading_sessions(limit: int = 10):
+async def get_trading_sessions(request: Request, response: Response, limit: int = 10):
     try:
-        sessions = trading_coordinator.trading_sessions[-limit:]
+        # The appended-count only moves when a cycle completes, so it versions
+        # the payload; unchanged polls get an empty 304. The deque length
+        # stops moving once it hits maxlen, so it can't serve as the version.
+        etag = make_etag(trading_coordinator.sessions_recorded, limit)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        response.headers["ETag"] = etag
+
+        # deques don't support slicing; islice walks only the tail entries
+        sessions = list(itertools.islice(
+            trading_coordinator.trading_sessions,
+            max(0, len(trading_coordinator.trading_sessions) - limit),
+            None
+        ))
         return {
             "total_sessions": len(trading_coordinator.trading_sessions),
             "sessions": sessions
@@ -88,7 +135,7 @@ async def get_portfolio(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        user_coordinator = TradingCoordinator(user_id=current_user.id, db_session=session)
+        user_coordinator = await get_user_coordinator(current_user.id, session)
         portfolio = await user_coordinator.execution_agent.get_portfolio_summary()
         return portfolio
     except Exception as e:
@@ -101,7 +148,7 @@ async def get_performance(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        user_coordinator = TradingCoordinator(user_id=current_user.id, db_session=session)
+        user_coordinator = await get_user_coordinator(current_user.id, session)
         await user_coordinator.execution_agent.load_trade_stats()
         performance = await user_coordinator.execution_agent.get_performance_metrics()
         return performance
@@ -110,9 +157,14 @@ async def get_performance(
 
 
 @router.get("/risk-settings")
-async def get_risk_settings():
+async def get_risk_settings(request: Request, response: Response):
     try:
         thresholds = trading_coordinator.decision_maker.get_thresholds()
+        etag = make_etag(*sorted(thresholds.items()))
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        response.headers["ETag"] = etag
+
         return {
             "status": "success",
             "settings": thresholds,
@@ -142,9 +194,15 @@ async def set_risk_settings(request: RiskSettingsRequest):
 
 
 @router.get("/decisions/history")
-async def get_decision_history(limit: int = 20):
+async def get_decision_history(request: Request, response: Response, limit: int = 20):
     try:
-        decisions = trading_coordinator.decision_maker.decision_history[-limit:]
+        etag = make_etag(trading_coordinator.decision_maker.decisions_recorded, limit)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        response.headers["ETag"] = etag
+
+        history = trading_coordinator.decision_maker.decision_history
+        decisions = list(itertools.islice(history, max(0, len(history) - limit), None))
         return {
             "total_decisions": len(trading_coordinator.decision_maker.decision_history),
             "decisions": decisions
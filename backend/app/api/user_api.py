@@ -3,8 +3,12 @@ User Management API Endpoints
 Handles user registration, login, and profile management
 """
 
+import hashlib
 import logging
-from fastapi import APIRouter, HTTPException, Depends, status
+import time
+from typing import Dict, Tuple
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -17,7 +21,8 @@ from app.schemas.user import (
     UserResponse,
     LoginResponse,
     BuyStockRequest,
-    SellStockRequest
+    SellStockRequest,
+    BatchOrderRequest
 )
 
 logger = logging.getLogger(__name__)
@@ -25,13 +30,35 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["users"])
 security = HTTPBearer()
 
+# Token→user cache: a polling frontend re-authenticates on every request,
+# paying a signature verify plus one SELECT each time. Keyed by the full
+# token so rotation/logout invalidates naturally; entries live 30 seconds.
+_TOKEN_CACHE_TTL = 30.0
+_TOKEN_CACHE_MAX = 10_000
+_token_cache: Dict[str, Tuple[float, object]] = {}
+
+
+def make_etag(*parts) -> str:
+    """Build a short ETag from a few cheap version markers"""
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(str(part).encode())
+        h.update(b"\x00")
+    return f'"{h.hexdigest()}"'
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ):
     token = credentials.credentials
+
+    cached = _token_cache.get(token)
+    if cached is not None and time.monotonic() - cached[0] < _TOKEN_CACHE_TTL:
+        return cached[1]
+
     payload = auth_service.decode_access_token(token)
-    
+
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,7 +79,15 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    
+
+    # Only cache tokens that outlive the cache window, so an entry can never
+    # be served past its token's expiry.
+    exp = payload.get("exp")
+    if exp is None or exp - time.time() > _TOKEN_CACHE_TTL:
+        if len(_token_cache) >= _TOKEN_CACHE_MAX:
+            _token_cache.clear()
+        _token_cache[token] = (time.monotonic(), user)
+
     return user
 
 
@@ -70,12 +105,7 @@ async def register_user(
             initial_capital=request.initial_capital
         )
         
-        return UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            created_at=user.created_at.isoformat()
-        )
+        return UserResponse.model_validate(user)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -108,25 +138,25 @@ async def login_user(
     return LoginResponse(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            created_at=user.created_at.isoformat()
-        )
+        user=UserResponse.model_validate(user)
     )
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
+    request: Request,
+    response: Response,
     current_user = Depends(get_current_user)
 ):
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        created_at=current_user.created_at.isoformat()
-    )
+    # Polling clients re-fetch /me constantly; a 304 skips re-serializing
+    # the identical payload.
+    etag = make_etag(current_user.id, current_user.username,
+                     current_user.email, current_user.created_at)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+    response.headers["ETag"] = etag
+
+    return UserResponse.model_validate(current_user)
 
 
 @router.get("/me/portfolio")
@@ -154,8 +184,7 @@ async def buy_stock_for_user(
     try:
         price = request.price
         if price is None or price == 0:
-            from app.services.portfolio_service import portfolio_service as ps
-            prices = await ps.get_current_prices(db, [request.symbol])
+            prices = await portfolio_service.get_current_prices(db, [request.symbol])
             price = prices.get(request.symbol)
             if price is None:
                 raise ValueError(f"Could not fetch current price for {request.symbol}")
@@ -184,8 +213,7 @@ async def sell_stock_for_user(
     try:
         price = request.price
         if price is None or price == 0:
-            from app.services.portfolio_service import portfolio_service as ps
-            prices = await ps.get_current_prices(db, [request.symbol])
+            prices = await portfolio_service.get_current_prices(db, [request.symbol])
             price = prices.get(request.symbol)
             if price is None:
                 raise ValueError(f"Could not fetch current price for {request.symbol}")
@@ -205,20 +233,62 @@ async def sell_stock_for_user(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/me/portfolio/trade-batch")
+async def trade_batch_for_user(
+    request: BatchOrderRequest,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Execute several orders with one price query and one commit"""
+    try:
+        missing = [o.symbol for o in request.orders if not o.price]
+        prices = await portfolio_service.get_current_prices(db, missing) if missing else {}
+
+        orders = []
+        for o in request.orders:
+            price = o.price or prices.get(o.symbol)
+            if price is None:
+                raise ValueError(f"Could not fetch current price for {o.symbol}")
+            orders.append({
+                'action': o.action,
+                'symbol': o.symbol,
+                'shares': o.shares,
+                'price': price
+            })
+
+        results = await portfolio_service.execute_orders_batch(
+            db, current_user.id, orders
+        )
+        return {
+            'status': 'success',
+            'count': len(results),
+            'results': results
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error executing batch orders: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/me/transactions")
 async def get_my_transactions(
     limit: int = 50,
+    cursor: int = None,
     current_user = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     try:
-        transactions = await portfolio_service.get_transaction_history(
-            db, current_user.id, limit
+        # Keyset pagination: pass next_cursor back as ?cursor= for the next
+        # page; stable even while new transactions are appended.
+        transactions, next_cursor = await portfolio_service.get_transaction_page(
+            db, current_user.id, limit, cursor
         )
         return {
             'status': 'success',
             'count': len(transactions),
-            'transactions': transactions
+            'transactions': transactions,
+            'next_cursor': next_cursor
         }
     except Exception as e:
         logger.error(f"Error getting transactions: {e}")
@@ -1,4 +1,5 @@
 import os
+from functools import cached_property
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -11,6 +12,8 @@ class Settings(BaseSettings):
     DB_USER: str = Field(..., description="Database user")
     DB_PASSWORD: str = Field(..., description="Database password")
     DB_NAME: str = Field(..., description="Database name")
+    DB_POOL_SIZE: int = Field(default=20, description="Connections kept warm in the pool")
+    DB_MAX_OVERFLOW: int = Field(default=40, description="Extra connections allowed under burst")
 
     MARKET_AGENT_URL: str = "http://localhost:8000"
     DECISION_AGENT_URL: str = "http://localhost:8001"
@@ -25,6 +28,12 @@ class Settings(BaseSettings):
     MODEL_THRESHOLD_SELL: float = 0.4
 
     LOG_LEVEL: str = "INFO"
+    DEBUG: bool = False
+
+    CORS_ORIGINS: str = Field(
+        default="http://localhost:3000,http://localhost:5173",
+        description="Comma-separated list of allowed CORS origins"
+    )
 
     SECRET_KEY: str = Field(
         default="your-secret-key-please-change-in-production-use-openssl-rand-hex-32",
@@ -38,19 +47,25 @@ class Settings(BaseSettings):
         "case_sensitive": False
     }
 
-    @property
+    # cached_property: these values never change for a process, so the
+    # f-string is built once instead of on every access.
+    @cached_property
     def database_url(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
-    @property  
+    @cached_property
     def database_url_sync(self) -> str:
         return f"postgresql+psycopg2://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-    
-    @property
+
+    @cached_property
+    def cors_origins(self) -> list:
+        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+
+    @cached_property
     def app_name(self) -> str:
         return "Multi-Agent Trading System"
-    
-    @property
+
+    @cached_property
     def app_version(self) -> str:
         return "1.0.0"
 
@@ -1,4 +1,5 @@
 from .user import User, UserPortfolio
 from .stock import StockPrice, TrackedStock
+from .position import Position, Transaction
 
-__all__ = ["User", "UserPortfolio", "StockPrice", "TrackedStock"]
+__all__ = ["User", "UserPortfolio", "StockPrice", "TrackedStock", "Position", "Transaction"]
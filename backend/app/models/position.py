@@ -0,0 +1,81 @@
+"""
+Position and Transaction Models
+Relational replacement for the JSON blobs on UserPortfolio: one row per
+holding and an append-only trade log, so trades update a single row
+instead of rewriting the whole serialized portfolio.
+"""
+
+from sqlalchemy import String, Float, Integer, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import mapped_column, Mapped
+from app.core.database import Base
+from datetime import datetime
+
+
+class Position(Base):
+    """Model for one (user, symbol) holding"""
+
+    __tablename__ = "positions"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(10), primary_key=True)
+
+    shares: Mapped[int] = mapped_column(Integer, nullable=False)
+    avg_price: Mapped[float] = mapped_column(Float, nullable=False)
+    # Naive local timestamps, matching the isoformat strings the JSON blobs stored
+    buy_date: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<Position(user_id={self.user_id}, symbol={self.symbol}, shares={self.shares})>"
+
+    def to_dict(self):
+        return {
+            'shares': self.shares,
+            'avg_price': self.avg_price,
+            'buy_date': self.buy_date.isoformat() if self.buy_date else None,
+        }
+
+
+class Transaction(Base):
+    """Model for one executed trade (append-only)"""
+
+    __tablename__ = "transactions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    type: Mapped[str] = mapped_column(String(4), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(10), nullable=False)
+    shares: Mapped[int] = mapped_column(Integer, nullable=False)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    total: Mapped[float] = mapped_column(Float, nullable=False)
+    profit_loss: Mapped[float] = mapped_column(Float, nullable=True)
+    profit_loss_pct: Mapped[float] = mapped_column(Float, nullable=True)
+
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+    # History pages are "latest 50 for this user"; the descending composite
+    # index serves that as a top-N scan instead of sort-after-scan. It is
+    # keyed on id because get_transaction_page paginates on the id keyset
+    # (WHERE user_id = ? AND id < ? ORDER BY id DESC).
+    __table_args__ = (
+        Index('ix_tx_user_id_desc', 'user_id', text('id DESC')),
+    )
+
+    def __repr__(self):
+        return f"<Transaction(user_id={self.user_id}, type={self.type}, symbol={self.symbol}, shares={self.shares})>"
+
+    def to_dict(self):
+        entry = {
+            'type': self.type,
+            'symbol': self.symbol,
+            'shares': self.shares,
+            'price': self.price,
+            'total': self.total,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+        }
+        # P/L fields are only recorded on sells; keep buy entries in the
+        # same shape the JSON history used.
+        if self.profit_loss is not None:
+            entry['profit_loss'] = self.profit_loss
+            entry['profit_loss_pct'] = self.profit_loss_pct
+        return entry
@@ -3,18 +3,18 @@ Stock Price Model
 Stores current stock prices and historical data
 """
 
-from sqlalchemy import String, Float, Integer, DateTime, BigInteger, Index
+from sqlalchemy import String, Float, Integer, Date, DateTime, BigInteger, Index, text
 from sqlalchemy.orm import mapped_column, Mapped
 from sqlalchemy.sql import func
 from app.core.database import Base
-from datetime import datetime
+from datetime import datetime, date
 
 
 class StockPrice(Base):
     """Model for storing stock price data"""
     
     __tablename__ = "stock_prices"
-    
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
     symbol: Mapped[str] = mapped_column(String(10), nullable=False, index=True)
     
@@ -25,8 +25,11 @@ class StockPrice(Base):
     close: Mapped[float] = mapped_column(Float, nullable=False)
     volume: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
     
-    # Date of the price data (stored as string YYYY-MM-DD for consistency)
-    date: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    # Date of the price data: native DATE (4 bytes vs 20-char strings) so
+    # range scans compare integers, not text, and the date indexes stay small.
+    # Also the partition key, which Postgres requires in the primary key;
+    # id alone still identifies a row.
+    date: Mapped[date] = mapped_column(Date, nullable=False, index=True, primary_key=True)
     
     # Optional fields (from API data)
     after_hours: Mapped[float] = mapped_column(Float, nullable=True)
@@ -37,9 +40,18 @@ class StockPrice(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
     
-    # Composite index for faster queries
+    # Composite index for faster queries. The DESC variant serves the
+    # latest-price pattern (WHERE symbol=? ORDER BY date DESC LIMIT 1) as an
+    # index-only scan: the key order matches the sort and INCLUDE carries the
+    # columns those queries select.
+    # Range-partitioned by date (see create_tables): queries bounded by a
+    # lookback window prune to a handful of yearly partitions whose indexes
+    # stay small enough to remain cache-resident.
     __table_args__ = (
         Index('ix_stock_symbol_date', 'symbol', 'date', unique=True),
+        Index('ix_stock_symbol_date_desc', 'symbol', text('date DESC'),
+              postgresql_include=['close', 'volume']),
+        {'postgresql_partition_by': 'RANGE (date)'},
     )
     
     def __repr__(self):
@@ -49,7 +61,7 @@ class StockPrice(Base):
         return {
             "id": self.id,
             "symbol": self.symbol,
-            "date": self.date,
+            "date": self.date.isoformat() if self.date else None,
             "open": self.open,
             "high": self.high,
             "low": self.low,
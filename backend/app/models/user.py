@@ -3,11 +3,27 @@ from sqlalchemy.orm import mapped_column, Mapped, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 from datetime import datetime
-import json
+from functools import lru_cache
+import orjson
+
+
+@lru_cache(maxsize=8192)
+def _parse_iso(value: str) -> datetime:
+    """Parse an isoformat string once per distinct value.
+
+    buy_date strings repeat across requests for the same portfolio, so
+    the parse is memoized instead of re-run on every analysis pass.
+    """
+    return datetime.fromisoformat(value)
+
 
 class User(Base):
     __tablename__ = "users"
-    
+    # Fetch created_at/updated_at via INSERT .. RETURNING at flush, so
+    # registration needs no refresh round-trip to see server defaults.
+    __mapper_args__ = {"eager_defaults": True}
+
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
     username: Mapped[str] = mapped_column(String(50), unique=True, nullable=False, index=True)
     email: Mapped[str] = mapped_column(String(100), unique=True, nullable=False, index=True)
@@ -38,21 +54,21 @@ class UserPortfolio(Base):
     
     def get_positions_dict(self) -> dict:
         try:
-            return json.loads(self.positions) if self.positions else {}
+            return orjson.loads(self.positions) if self.positions else {}
         except:
             return {}
-    
+
     def set_positions_dict(self, positions: dict):
-        self.positions = json.dumps(positions)
-    
+        self.positions = orjson.dumps(positions).decode()
+
     def get_transactions_list(self) -> list:
         try:
-            return json.loads(self.transaction_history) if self.transaction_history else []
+            return orjson.loads(self.transaction_history) if self.transaction_history else []
         except:
             return []
-    
+
     def set_transactions_list(self, transactions: list):
-        self.transaction_history = json.dumps(transactions)
+        self.transaction_history = orjson.dumps(transactions).decode()
         
     def get_portfolio_value(self, current_prices: dict) -> float:
         positions = self.get_positions_dict()
@@ -66,14 +82,15 @@ class UserPortfolio(Base):
         """Analyze all positions with current returns"""
         analysis = []
         positions = self.get_positions_dict()
-        
+        now = datetime.now()
+
         for ticker, pos in positions.items():
             current_price = current_prices.get(ticker, pos['avg_price'])
             value = pos['shares'] * current_price
             return_pct = ((current_price - pos['avg_price']) / pos['avg_price']) * 100
-            
-            buy_date = datetime.fromisoformat(pos['buy_date']) if isinstance(pos['buy_date'], str) else pos['buy_date']
-            
+
+            buy_date = _parse_iso(pos['buy_date']) if isinstance(pos['buy_date'], str) else pos['buy_date']
+
             analysis.append({
                 'ticker': ticker,
                 'shares': pos['shares'],
@@ -81,7 +98,7 @@ class UserPortfolio(Base):
                 'current_price': current_price,
                 'value': value,
                 'return': return_pct,
-                'days_held': (datetime.now() - buy_date).days
+                'days_held': (now - buy_date).days
             })
         return analysis
     
@@ -1,19 +1,29 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict
 
+# One shared, precompiled config: unknown keys are dropped instead of
+# rejected and stray whitespace is stripped during validation.
+_schema_config = ConfigDict(extra='ignore', str_strip_whitespace=True, from_attributes=True)
+
 
 class UserPortfolio(BaseModel):
+    model_config = _schema_config
+
     user_id: str
     cash: float
     positions: Dict[str, Dict]  # {symbol: {shares, avg_price, buy_date}}
 
 
 class AnalyzeRequest(BaseModel):
+    model_config = _schema_config
+
     portfolio: UserPortfolio
     analyze_new_opportunities: bool = True
 
 
 class DiscoverRequest(BaseModel):
+    model_config = _schema_config
+
     portfolio_symbols: List[str]
     exclude_sectors: List[str] = []
-    top_n: int = 10
\ No newline at end of file
+    top_n: int = 10
@@ -1,23 +1,35 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 
+# One shared, precompiled config: unknown keys are dropped instead of
+# rejected and stray whitespace is stripped during validation.
+_schema_config = ConfigDict(extra='ignore', str_strip_whitespace=True, from_attributes=True)
+
+
 # Request/Response Models
 class TrainingRequest(BaseModel):
+    model_config = _schema_config
+
     symbols: Optional[List[str]] = None
     use_sample: bool = False
-    
-    
+
+
 class TradingCycleRequest(BaseModel):
+    model_config = _schema_config
+
     symbols: List[str]
     use_csv: bool = False
     risk_tolerance: float = Field(default=0.5, ge=0.0, le=1.0, description="Risk tolerance: 0.0 (conservative) to 1.0 (aggressive)")
 
 
 class RiskSettingsRequest(BaseModel):
+    model_config = _schema_config
+
     risk_tolerance: float = Field(ge=0.0, le=1.0, description="Risk tolerance: 0.0 (conservative) to 1.0 (aggressive)")
 
 
 class SystemStatusResponse(BaseModel):
+    model_config = _schema_config
+
     status: str
     coordinator: dict
-    
\ No newline at end of file
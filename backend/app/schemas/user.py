@@ -1,7 +1,15 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, EmailStr, field_serializer
+from typing import List, Optional
+
+# One shared, precompiled config: unknown keys are dropped instead of
+# rejected and stray whitespace is stripped during validation.
+_schema_config = ConfigDict(extra='ignore', str_strip_whitespace=True, from_attributes=True)
+
 
 class UserRegisterRequest(BaseModel):
+    model_config = _schema_config
+
     username: str
     email: EmailStr
     password: str
@@ -9,30 +17,60 @@ class UserRegisterRequest(BaseModel):
 
 
 class UserLoginRequest(BaseModel):
+    model_config = _schema_config
+
     username: str
     password: str
 
 
 class UserResponse(BaseModel):
+    # Built straight from the ORM user via model_validate
+    model_config = _schema_config
+
     id: int
     username: str
     email: str
-    created_at: str
+    created_at: datetime
+
+    @field_serializer('created_at')
+    def serialize_created_at(self, value: datetime) -> str:
+        return value.isoformat()
 
 
 class LoginResponse(BaseModel):
+    model_config = _schema_config
+
     access_token: str
     token_type: str
     user: UserResponse
 
 
 class BuyStockRequest(BaseModel):
+    model_config = _schema_config
+
     symbol: str
     shares: int
     price: Optional[float] = None
 
 
 class SellStockRequest(BaseModel):
+    model_config = _schema_config
+
     symbol: str
     shares: int
-    price: Optional[float] = None
\ No newline at end of file
+    price: Optional[float] = None
+
+
+class BatchOrderItem(BaseModel):
+    model_config = _schema_config
+
+    action: str  # 'BUY' or 'SELL'
+    symbol: str
+    shares: int
+    price: Optional[float] = None
+
+
+class BatchOrderRequest(BaseModel):
+    model_config = _schema_config
+
+    orders: List[BatchOrderItem]
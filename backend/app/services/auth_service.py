@@ -1,12 +1,16 @@
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 import bcrypt
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.user import User, UserPortfolio
 from app.core.config import settings
@@ -19,44 +23,78 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+
+@lru_cache(maxsize=4096)
+def _decode_cached(token: str) -> Tuple[dict, Optional[float]]:
+    """Verify and decode a token once, returning (payload, exp timestamp).
+
+    Signature verification plus base64/JSON decoding is pure work on an
+    immutable input, so the result is cached per token; callers only need
+    to re-check expiry against the returned timestamp.
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    exp = payload.get("exp")
+    return payload, float(exp) if exp is not None else None
+
+
 class AuthService:
     @staticmethod
-    def hash_password(password: str) -> str:
+    async def hash_password(password: str) -> str:
+        # bcrypt takes ~100-200ms by design; run it on a worker thread so
+        # one registration doesn't stall every other request on the loop.
         password_bytes = password.encode('utf-8')[:72]
-        return bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode('utf-8')
+        hashed = await asyncio.to_thread(bcrypt.hashpw, password_bytes, bcrypt.gensalt())
+        return hashed.decode('utf-8')
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
         password_bytes = plain_password.encode('utf-8')[:72]
         hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        return await asyncio.to_thread(bcrypt.checkpw, password_bytes, hashed_bytes)
     
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
-        
+
+        # jose accepts an int epoch for exp; plain arithmetic skips the
+        # datetime construction and the timestamp conversion at encode time.
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = int(time.time() + expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        
+            expire = int(time.time()) + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
         to_encode.update({"exp": expire})
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-        
+
         return encoded_jwt
     
     @staticmethod
     def decode_access_token(token: str) -> Optional[dict]:
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
+            payload, exp_ts = _decode_cached(token)
         except JWTError as e:
+            # lru_cache does not cache raised exceptions, so bad tokens
+            # are re-verified (and re-rejected) on every attempt.
             logger.error(f"JWT decode error: {e}")
             return None
+
+        # The signature never changes for a given token, but expiry does:
+        # re-check it on every call instead of re-verifying the HMAC.
+        if exp_ts is not None and time.time() >= exp_ts:
+            return None
+
+        return payload
     
     @staticmethod
     async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
-        query = select(User).where(User.username == username)
+        # Login reads user.portfolio right after this; eager-load it so
+        # auth is one round-trip instead of a lazy load (which raises
+        # under asyncio anyway).
+        query = (
+            select(User)
+            .options(selectinload(User.portfolio))
+            .where(User.username == username)
+        )
         result = await db.execute(query)
         return result.scalar_one_or_none()
     
@@ -67,8 +105,16 @@ class AuthService:
         return result.scalar_one_or_none()
     
     @staticmethod
-    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    async def get_user_by_id(
+        db: AsyncSession,
+        user_id: int,
+        load_related: bool = True
+    ) -> Optional[User]:
         query = select(User).where(User.id == user_id)
+        if load_related:
+            # Authenticated handlers read user.portfolio right after this
+            # lookup; loading it eagerly avoids a lazy-load SELECT per request.
+            query = query.options(selectinload(User.portfolio))
         result = await db.execute(query)
         return result.scalar_one_or_none()
     
@@ -88,7 +134,7 @@ class AuthService:
         if existing_email:
             raise ValueError(f"Email '{email}' already registered")
 
-        hashed_password = AuthService.hash_password(password)
+        hashed_password = await AuthService.hash_password(password)
         
         user = User(
             username=username,
@@ -107,8 +153,9 @@ class AuthService:
         )
         
         db.add(portfolio)
+        # user.id was assigned at flush and expire_on_commit=False keeps
+        # the instance usable after commit, so no refresh round-trip.
         await db.commit()
-        await db.refresh(user)
         
         logger.info(f"User registered: {username} with ${initial_capital} capital")
         
@@ -125,7 +172,7 @@ class AuthService:
         if not user:
             return None
         
-        if not AuthService.verify_password(password, user.hashed_password):
+        if not await AuthService.verify_password(password, user.hashed_password):
             return None
         
         return user
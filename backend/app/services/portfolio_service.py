@@ -1,12 +1,16 @@
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import select, delete, desc, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User, UserPortfolio
+from app.models.user import User, UserPortfolio, _parse_iso
+from app.models.position import Position, Transaction
+from app.models.stock import StockPrice
 
 logger = logging.getLogger(__name__)
 
@@ -17,71 +21,124 @@ class UserPortfolioService:
         query = select(UserPortfolio).where(UserPortfolio.user_id == user_id)
         result = await db.execute(query)
         return result.scalar_one_or_none()
-    
+
+    @staticmethod
+    async def get_positions(db: AsyncSession, user_id: int) -> Dict[str, Dict]:
+        """All holdings for a user as {symbol: {shares, avg_price, buy_date}}"""
+        result = await db.execute(
+            select(Position).where(Position.user_id == user_id)
+        )
+        return {pos.symbol: pos.to_dict() for pos in result.scalars()}
+
     @staticmethod
     async def get_current_prices(db: AsyncSession, symbols: List[str]) -> Dict[str, float]:
         from app.services.stock_data_service import stock_data_service
         return await stock_data_service.get_current_prices(db, symbols)
-    
+
     @staticmethod
-    async def buy_stock(
+    async def get_portfolio_valuation(db: AsyncSession, user_id: int) -> Dict:
+        """Headline portfolio numbers (cash, marked-to-market value, count).
+
+        The join against the latest close per symbol and the SUM/COUNT run
+        server-side, replacing a price query plus a Python loop over the
+        positions; symbols without a stored price fall back to avg_price.
+        Much lighter than get_portfolio_summary for callers that don't
+        need the per-position breakdown or its CSV price fallback.
+        """
+        portfolio = await UserPortfolioService.get_portfolio(db, user_id)
+
+        if not portfolio:
+            raise ValueError(f"Portfolio not found for user {user_id}")
+
+        latest_price = (
+            select(StockPrice.symbol, StockPrice.close)
+            .distinct(StockPrice.symbol)
+            .order_by(StockPrice.symbol, desc(StockPrice.date))
+            .subquery('latest_price')
+        )
+
+        stmt = (
+            select(
+                func.coalesce(
+                    func.sum(
+                        Position.shares
+                        * func.coalesce(latest_price.c.close, Position.avg_price)
+                    ),
+                    0.0,
+                ),
+                func.count(Position.symbol),
+            )
+            .join_from(
+                Position, latest_price,
+                Position.symbol == latest_price.c.symbol,
+                isouter=True,
+            )
+            .where(Position.user_id == user_id)
+        )
+
+        positions_value, positions_count = (await db.execute(stmt)).one()
+        positions_value = float(positions_value or 0.0)
+
+        return {
+            'cash': portfolio.cash,
+            'positions_value': positions_value,
+            'total_value': portfolio.cash + positions_value,
+            'positions_count': int(positions_count),
+        }
+
+    @staticmethod
+    async def _apply_buy(
         db: AsyncSession,
+        portfolio: UserPortfolio,
         user_id: int,
         symbol: str,
         shares: int,
         price: float
     ) -> Dict:
-        portfolio = await UserPortfolioService.get_portfolio(db, user_id)
-        
-        if not portfolio:
-            raise ValueError(f"Portfolio not found for user {user_id}")
-        
+        """Apply a buy against the positions table without committing"""
         cost = shares * price
-        
+
         if portfolio.cash < cost:
             raise ValueError(f"Insufficient funds. Need ${cost:.2f}, have ${portfolio.cash:.2f}")
 
         portfolio.cash -= cost
 
-        positions = portfolio.get_positions_dict()
-        
-        if symbol in positions:
-            # Average down/up
-            pos = positions[symbol]
-            total_shares = pos['shares'] + shares
-            total_cost = (pos['shares'] * pos['avg_price']) + cost
-            avg_price = total_cost / total_shares
-            
-            positions[symbol] = {
-                'shares': total_shares,
-                'avg_price': avg_price,
-                'buy_date': pos['buy_date']  # Keep original buy date
-            }
-        else:
-            positions[symbol] = {
-                'shares': shares,
-                'avg_price': price,
-                'buy_date': datetime.now().isoformat()
+        # One clock read per trade, shared by the position and the log entry
+        now = datetime.now()
+
+        # Single-row upsert: new positions insert, existing ones re-average
+        # in place, instead of rewriting a serialized blob.
+        stmt = pg_insert(Position).values(
+            user_id=user_id,
+            symbol=symbol,
+            shares=shares,
+            avg_price=price,
+            buy_date=now
+        ).on_conflict_do_update(
+            index_elements=[Position.user_id, Position.symbol],
+            set_={
+                'avg_price': (
+                    (Position.shares * Position.avg_price + cost)
+                    / (Position.shares + shares)
+                ),
+                'shares': Position.shares + shares,
+                # buy_date intentionally untouched: keep the original entry date
             }
-        
-        portfolio.set_positions_dict(positions)
-        
-        transactions = portfolio.get_transactions_list()
-        transactions.append({
-            'type': 'BUY',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'total': cost,
-            'timestamp': datetime.now().isoformat()
-        })
-        portfolio.set_transactions_list(transactions)
-        
-        await db.commit()
-        await db.refresh(portfolio)
-        
+        )
+        await db.execute(stmt)
+
+        db.add(Transaction(
+            user_id=user_id,
+            type='BUY',
+            symbol=symbol,
+            shares=shares,
+            price=price,
+            total=cost,
+            timestamp=now
+        ))
+
         logger.info(f"User {user_id} bought {shares} shares of {symbol} at ${price:.2f}")
-        
+
         return {
             'status': 'success',
             'action': 'BUY',
@@ -91,9 +148,9 @@ class UserPortfolioService:
             'total_cost': cost,
             'remaining_cash': portfolio.cash
         }
-    
+
     @staticmethod
-    async def sell_stock(
+    async def buy_stock(
         db: AsyncSession,
         user_id: int,
         symbol: str,
@@ -101,57 +158,66 @@ class UserPortfolioService:
         price: float
     ) -> Dict:
         portfolio = await UserPortfolioService.get_portfolio(db, user_id)
-        
+
         if not portfolio:
             raise ValueError(f"Portfolio not found for user {user_id}")
-        
-        positions = portfolio.get_positions_dict()
-        
-        if symbol not in positions:
+
+        result = await UserPortfolioService._apply_buy(db, portfolio, user_id, symbol, shares, price)
+
+        # expire_on_commit=False keeps portfolio.cash valid after commit;
+        # refreshing here would just be an extra SELECT per trade.
+        await db.commit()
+
+        return result
+
+    @staticmethod
+    async def _apply_sell(
+        db: AsyncSession,
+        portfolio: UserPortfolio,
+        user_id: int,
+        symbol: str,
+        shares: int,
+        price: float
+    ) -> Dict:
+        """Apply a sell against the positions table without committing"""
+        pos = await db.get(Position, (user_id, symbol))
+
+        if pos is None:
             raise ValueError(f"No position in {symbol}")
-        
-        pos = positions[symbol]
-        
-        if pos['shares'] < shares:
-            raise ValueError(f"Insufficient shares. Have {pos['shares']}, trying to sell {shares}")
-        
+
+        if pos.shares < shares:
+            raise ValueError(f"Insufficient shares. Have {pos.shares}, trying to sell {shares}")
+
         revenue = shares * price
-        
+
         # Update cash
         portfolio.cash += revenue
-        
+
+        # Calculate profit/loss
+        profit_loss = revenue - (shares * pos.avg_price)
+        profit_loss_pct = (profit_loss / (shares * pos.avg_price)) * 100
+
         # Update positions
-        if pos['shares'] == shares:
+        if pos.shares == shares:
             # Sell entire position
-            del positions[symbol]
+            await db.delete(pos)
         else:
             # Partial sell
-            positions[symbol]['shares'] -= shares
-        
-        portfolio.set_positions_dict(positions)
-        
-        # Calculate profit/loss
-        profit_loss = revenue - (shares * pos['avg_price'])
-        profit_loss_pct = (profit_loss / (shares * pos['avg_price'])) * 100
-        
-        transactions = portfolio.get_transactions_list()
-        transactions.append({
-            'type': 'SELL',
-            'symbol': symbol,
-            'shares': shares,
-            'price': price,
-            'total': revenue,
-            'profit_loss': profit_loss,
-            'profit_loss_pct': profit_loss_pct,
-            'timestamp': datetime.now().isoformat()
-        })
-        portfolio.set_transactions_list(transactions)
-        
-        await db.commit()
-        await db.refresh(portfolio)
-        
+            pos.shares -= shares
+
+        db.add(Transaction(
+            user_id=user_id,
+            type='SELL',
+            symbol=symbol,
+            shares=shares,
+            price=price,
+            total=revenue,
+            profit_loss=profit_loss,
+            profit_loss_pct=profit_loss_pct
+        ))
+
         logger.info(f"User {user_id} sold {shares} shares of {symbol} at ${price:.2f} (P/L: ${profit_loss:.2f})")
-        
+
         return {
             'status': 'success',
             'action': 'SELL',
@@ -163,16 +229,65 @@ class UserPortfolioService:
             'profit_loss_pct': profit_loss_pct,
             'remaining_cash': portfolio.cash
         }
-    
+
+    @staticmethod
+    async def sell_stock(
+        db: AsyncSession,
+        user_id: int,
+        symbol: str,
+        shares: int,
+        price: float
+    ) -> Dict:
+        portfolio = await UserPortfolioService.get_portfolio(db, user_id)
+
+        if not portfolio:
+            raise ValueError(f"Portfolio not found for user {user_id}")
+
+        result = await UserPortfolioService._apply_sell(db, portfolio, user_id, symbol, shares, price)
+
+        await db.commit()
+
+        return result
+
+    @staticmethod
+    async def execute_orders_batch(
+        db: AsyncSession,
+        user_id: int,
+        orders: List[Dict]
+    ) -> List[Dict]:
+        """Execute several orders with one portfolio fetch and one commit"""
+        portfolio = await UserPortfolioService.get_portfolio(db, user_id)
+
+        if not portfolio:
+            raise ValueError(f"Portfolio not found for user {user_id}")
+
+        results = []
+        for order in orders:
+            action = order['action'].upper()
+            if action == 'BUY':
+                results.append(await UserPortfolioService._apply_buy(
+                    db, portfolio, user_id, order['symbol'], order['shares'], order['price']
+                ))
+            elif action == 'SELL':
+                results.append(await UserPortfolioService._apply_sell(
+                    db, portfolio, user_id, order['symbol'], order['shares'], order['price']
+                ))
+            else:
+                raise ValueError(f"Unknown order action: {order['action']}")
+
+        await db.commit()
+
+        return results
+
     @staticmethod
     async def get_portfolio_summary(db: AsyncSession, user_id: int) -> Dict:
         portfolio = await UserPortfolioService.get_portfolio(db, user_id)
-        
+
         if not portfolio:
             raise ValueError(f"Portfolio not found for user {user_id}")
-        
-        positions = portfolio.get_positions_dict()
-        
+
+        positions = await UserPortfolioService.get_positions(db, user_id)
+
         if not positions:
             return {
                 'user_id': user_id,
@@ -187,41 +302,55 @@ class UserPortfolioService:
 
         symbols = list(positions.keys())
         current_prices = await UserPortfolioService.get_current_prices(db, symbols)
-        
-        # Analyze positions
+
+        # Vectorized position math: one NumPy pass over aligned arrays; the
+        # remaining Python loop only assembles the response dicts.
+        shares_arr = np.fromiter(
+            (positions[s]['shares'] for s in symbols), dtype=np.float64, count=len(symbols)
+        )
+        avg_arr = np.fromiter(
+            (positions[s]['avg_price'] for s in symbols), dtype=np.float64, count=len(symbols)
+        )
+        price_arr = np.array(
+            [current_prices.get(s, positions[s]['avg_price']) for s in symbols],
+            dtype=np.float64
+        )
+
+        cost_basis_arr = shares_arr * avg_arr
+        current_value_arr = shares_arr * price_arr
+        profit_loss_arr = current_value_arr - cost_basis_arr
+        profit_loss_pct_arr = np.divide(
+            profit_loss_arr, cost_basis_arr,
+            out=np.zeros_like(profit_loss_arr),
+            where=cost_basis_arr > 0
+        ) * 100
+
+        now = datetime.now()
         position_list = []
-        total_invested = 0
-        total_current_value = 0
-        
-        for symbol, pos in positions.items():
-            current_price = current_prices.get(symbol, pos['avg_price'])
-            cost_basis = pos['shares'] * pos['avg_price']
-            current_value = pos['shares'] * current_price
-            profit_loss = current_value - cost_basis
-            profit_loss_pct = (profit_loss / cost_basis) * 100 if cost_basis > 0 else 0
-            
-            buy_date = datetime.fromisoformat(pos['buy_date']) if isinstance(pos['buy_date'], str) else pos['buy_date']
-            
+        for i, symbol in enumerate(symbols):
+            pos = positions[symbol]
+            buy_date = _parse_iso(pos['buy_date']) if isinstance(pos['buy_date'], str) else pos['buy_date']
+
             position_list.append({
                 'symbol': symbol,
                 'shares': pos['shares'],
                 'avg_price': pos['avg_price'],
-                'current_price': current_price,
-                'cost_basis': cost_basis,
-                'current_value': current_value,
-                'profit_loss': profit_loss,
-                'profit_loss_pct': profit_loss_pct,
-                'days_held': (datetime.now() - buy_date).days,
+                'current_price': float(price_arr[i]),
+                'cost_basis': float(cost_basis_arr[i]),
+                'current_value': float(current_value_arr[i]),
+                'profit_loss': float(profit_loss_arr[i]),
+                'profit_loss_pct': float(profit_loss_pct_arr[i]),
+                'days_held': (now - buy_date).days,
                 'buy_date': pos['buy_date']
             })
-            
-            total_invested += cost_basis
-            total_current_value += current_value
-        
+
+        total_invested = float(cost_basis_arr.sum())
+        total_current_value = float(current_value_arr.sum())
+
         total_value = portfolio.cash + total_current_value
         total_return = total_current_value - total_invested
         total_return_pct = (total_return / total_invested * 100) if total_invested > 0 else 0
-        
+
         return {
             'user_id': user_id,
             'cash': portfolio.cash,
@@ -235,17 +364,34 @@ class UserPortfolioService:
             'created_at': portfolio.created_at.isoformat(),
             'updated_at': portfolio.updated_at.isoformat()
         }
-    
+
+    @staticmethod
+    async def get_transaction_page(
+        db: AsyncSession,
+        user_id: int,
+        limit: int = 50,
+        before: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """Most-recent-first page of transactions plus the next keyset cursor.
+
+        The cursor is the id of the oldest transaction on the previous page;
+        ids are monotonically assigned, so paging below it is stable no
+        matter how many trades are appended meanwhile.
+        """
+        query = select(Transaction).where(Transaction.user_id == user_id)
+        if before is not None:
+            query = query.where(Transaction.id < before)
+        query = query.order_by(desc(Transaction.id)).limit(limit)
+
+        result = await db.execute(query)
+        rows = result.scalars().all()
+
+        next_cursor = rows[-1].id if len(rows) == limit else None
+        return [tx.to_dict() for tx in rows], next_cursor
+
     @staticmethod
     async def get_transaction_history(db: AsyncSession, user_id: int, limit: int = 50) -> List[Dict]:
-        portfolio = await UserPortfolioService.get_portfolio(db, user_id)
-        
-        if not portfolio:
-            return []
-        
-        transactions = portfolio.get_transactions_list()
-        
-        # Return most recent first
-        return list(reversed(transactions[-limit:]))
+        transactions, _ = await UserPortfolioService.get_transaction_page(db, user_id, limit)
+        return transactions
 
 portfolio_service = UserPortfolioService()
@@ -1,15 +1,90 @@
+import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional
 from pathlib import Path
 import pandas as pd
+import pyarrow.parquet as pq
 from sqlalchemy import select, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import async_session_maker
 from app.models.stock import StockPrice, TrackedStock
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import: every loader and price lookup references the
+# same dataset directory, so there is no point rebuilding the Path per call.
+_DATASET_DIR = Path(__file__).resolve().parent.parent.parent / "dataset_of_stocks" / "stocks"
+
+# Columnar copies of the CSV dataset, produced by convert_dataset.py;
+# readers prefer these and fall back to the CSVs when absent.
+_PARQUET_DIR = _DATASET_DIR.parent / "stocks_parquet"
+
+# Symbols finished by a previous full-dataset load; lets a restart resume
+# instead of re-probing all ~500 symbols after a crash mid-initialization.
+_CHECKPOINT_PATH = _DATASET_DIR.parent / "_loaded.json"
+
+
+def _read_checkpoint() -> set:
+    try:
+        if _CHECKPOINT_PATH.exists():
+            return set(json.loads(_CHECKPOINT_PATH.read_text()))
+    except Exception as e:
+        logger.warning(f"Could not read loader checkpoint: {e}")
+    return set()
+
+
+def _write_checkpoint(loaded: set) -> None:
+    try:
+        _CHECKPOINT_PATH.write_text(json.dumps(sorted(loaded)))
+    except Exception as e:
+        logger.warning(f"Could not write loader checkpoint: {e}")
+
+
+def _tail_row(csv_path: Path) -> Optional[dict]:
+    """Last data row of a CSV as {column: raw string}.
+
+    Reads the header line plus the final 4KB instead of parsing the whole
+    file — the updater only wants the most recent bar of a multi-decade
+    series.
+    """
+    with open(csv_path, 'rb') as f:
+        header_line = f.readline().decode('utf-8').strip()
+        if not header_line:
+            return None
+
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(len(header_line), size - 4096))
+        lines = f.read().decode('utf-8', errors='replace').strip().splitlines()
+
+    names = [h.strip().lower() for h in header_line.split(',')]
+    for line in reversed(lines):
+        fields = line.split(',')
+        if len(fields) == len(names) and fields[0] != names[0]:
+            return dict(zip(names, fields))
+    return None
+
+
+def _cutoff_for(days: Optional[int]) -> Optional[pd.Timestamp]:
+    """Batch-wide load cutoff, or None to load the full history."""
+    if days is None:
+        return None
+    return pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+
+
+@lru_cache(maxsize=1)
+def _list_symbols() -> tuple:
+    """Symbols available in the dataset directory (scanned once).
+
+    The dataset only changes when it is re-downloaded, i.e. never within
+    a process lifetime, so one directory walk serves every caller.
+    """
+    return tuple(sorted(p.stem for p in _DATASET_DIR.glob("*.csv")))
+
 TRACKED_STOCKS = [
     "AAPL",    # Apple
     "MSFT",    # Microsoft
@@ -33,17 +108,18 @@ class StockDataService:
     @staticmethod
     async def initialize_tracked_stocks(db: AsyncSession):
         try:
-            for symbol in TRACKED_STOCKS:
-                # Check if already exists
-                query = select(TrackedStock).where(TrackedStock.symbol == symbol)
-                result = await db.execute(query)
-                existing = result.scalar_one_or_none()
-                
-                if not existing:
-                    tracked = TrackedStock(symbol=symbol, is_active=True)
-                    db.add(tracked)
-                    logger.info(f"Added tracked stock: {symbol}")
-            
+            # One IN query fetches every already-tracked symbol; checking
+            # each candidate is then a set lookup, not a round-trip.
+            result = await db.execute(
+                select(TrackedStock.symbol).where(TrackedStock.symbol.in_(TRACKED_STOCKS))
+            )
+            existing = set(result.scalars().all())
+
+            missing = [s for s in TRACKED_STOCKS if s not in existing]
+            if missing:
+                db.add_all(TrackedStock(symbol=s, is_active=True) for s in missing)
+                logger.info(f"Added tracked stocks: {', '.join(missing)}")
+
             await db.commit()
             logger.info(f"Initialized {len(TRACKED_STOCKS)} tracked stocks")
             
@@ -53,111 +129,222 @@ class StockDataService:
             raise
     
     @staticmethod
-    async def load_stock_data_from_csv(db: AsyncSession, symbol: str, days: Optional[int] = None) -> int:
-        dataset_dir = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks"
-        csv_path = dataset_dir / f"{symbol}.csv"
-        
-        if not csv_path.exists():
+    async def load_stock_data_from_csv(symbol: str, cutoff: Optional[pd.Timestamp] = None) -> Optional[int]:
+        """Load one symbol; returns rows inserted, or None if the load failed."""
+        parquet_path = _PARQUET_DIR / f"{symbol}.parquet"
+        data_path = parquet_path if parquet_path.exists() else _DATASET_DIR / f"{symbol}.csv"
+
+        if not data_path.exists():
             logger.warning(f"CSV file not found for {symbol}")
-            return 0
-        
+            return None
+
+        # Each call owns a session so symbol loads can run concurrently
+        # without serializing on a shared transaction.
+        async with async_session_maker() as db:
+            return await StockDataService._load_symbol(db, symbol, data_path, cutoff)
+
+    @staticmethod
+    async def _load_symbol(db: AsyncSession, symbol: str, data_path: Path, cutoff: Optional[pd.Timestamp]) -> Optional[int]:
         try:
-            df = pd.read_csv(csv_path)
-            
+            # Parsing a whole CSV blocks for tens of ms; run it on the
+            # default thread pool so other coroutines keep progressing.
+            # Parquet decodes typed columns directly, several times faster
+            # than text parsing.
+            if data_path.suffix == '.parquet':
+                df = await asyncio.to_thread(pd.read_parquet, data_path)
+            else:
+                df = await asyncio.to_thread(pd.read_csv, data_path)
+
             # Normalize column names
             df.columns = df.columns.str.lower()
 
-            df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-            
-            # Filter to last N days if specified
-            if days is not None:
-                cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-                df = df[df['date'] >= cutoff_date]
-            
+            df['date'] = pd.to_datetime(df['date'])
+
+            # The callers compute the cutoff once per batch, and comparing
+            # while the column is still datetime64 is a single vectorized
+            # int64 sweep rather than a per-element date comparison.
+            if cutoff is not None:
+                df = df[df['date'] >= cutoff]
+
             # Sort by date
             df = df.sort_values('date')
-            
+
             if 'volume' not in df.columns:
                 df['volume'] = 1000000
 
-            existing_query = select(func.count(StockPrice.id)).where(StockPrice.symbol == symbol)
-            existing_result = await db.execute(existing_query)
-            existing_count = existing_result.scalar() or 0
-            
-            if existing_count >= len(df):
-                logger.info(f"{symbol}: Already has {existing_count} records, skipping")
+            if df.empty:
                 return 0
-            
-            delete_stmt = delete(StockPrice).where(StockPrice.symbol == symbol)
-            await db.execute(delete_stmt)
-            
-            count = 0
-            batch_size = 500
-            
-            for i in range(0, len(df), batch_size):
-                batch = df.iloc[i:i+batch_size]
-                
-                for _, row in batch.iterrows():
-                    stock_price = StockPrice(
-                        symbol=symbol,
-                        date=row['date'],
-                        open=float(row['open']),
-                        high=float(row['high']),
-                        low=float(row['low']),
-                        close=float(row['close']),
-                        volume=int(row['volume']),
-                        status='OK'
-                    )
-                    db.add(stock_price)
-                    count += 1
-                
+
+            # Down-convert to native dates last; the column is DATE in the
+            # database.
+            df['date'] = df['date'].dt.date
+
+            # MAX(date) is a one-page probe down the (symbol, date DESC)
+            # index, unlike COUNT which scans every entry for the symbol —
+            # and comparing dates stays correct when older rows were
+            # backfilled, where the old count >= len(df) heuristic broke.
+            latest_stored = await db.scalar(
+                select(func.max(StockPrice.date)).where(StockPrice.symbol == symbol)
+            )
+
+            if latest_stored is not None and latest_stored >= df['date'].iloc[-1]:
+                logger.info(f"{symbol}: Up to date through {latest_stored}, skipping")
+                return 0
+
+            if db.get_bind().dialect.name == 'postgresql':
+                # COPY streams the whole frame over the wire in one
+                # statement, skipping per-row INSERT parse/plan and ORM
+                # unit-of-work bookkeeping. It lands in a temp table and
+                # moves over with ON CONFLICT DO NOTHING, so re-runs write
+                # only genuinely new rows instead of deleting and
+                # rewriting thousands of unchanged ones (and their WAL).
+                records = list(zip(
+                    [symbol] * len(df),
+                    df['date'],
+                    df['open'].astype('float64').tolist(),
+                    df['high'].astype('float64').tolist(),
+                    df['low'].astype('float64').tolist(),
+                    df['close'].astype('float64').tolist(),
+                    df['volume'].astype('int64').tolist(),
+                    ['OK'] * len(df),
+                ))
+                conn = await db.connection()
+                raw = await conn.get_raw_connection()
+                pg = raw.driver_connection
+                await pg.execute(
+                    "CREATE TEMP TABLE _stage_stock_prices ("
+                    " symbol varchar(10), date date,"
+                    " open float8, high float8, low float8, close float8,"
+                    " volume bigint, status varchar(20)"
+                    ") ON COMMIT DROP"
+                )
+                await pg.copy_records_to_table(
+                    '_stage_stock_prices',
+                    records=records,
+                    columns=['symbol', 'date', 'open', 'high', 'low', 'close', 'volume', 'status'],
+                )
+                tag = await pg.execute(
+                    "INSERT INTO stock_prices"
+                    " (symbol, date, open, high, low, close, volume, status)"
+                    " SELECT symbol, date, open, high, low, close, volume, status"
+                    " FROM _stage_stock_prices"
+                    " ON CONFLICT (symbol, date) DO NOTHING"
+                )
+                count = int(tag.split()[-1])
                 await db.commit()
-            
+            else:
+                # ORM fallback for non-Postgres dev databases: drop and
+                # reload the symbol, since ON CONFLICT targets Postgres.
+                # Cast the columns once, then iterate plain tuples:
+                # iterrows boxes every row into a Series, which dominates
+                # the Python-side cost of the loop.
+                delete_stmt = delete(StockPrice).where(StockPrice.symbol == symbol)
+                await db.execute(delete_stmt)
+
+                for col in ('open', 'high', 'low', 'close'):
+                    df[col] = df[col].astype('float64')
+                df['volume'] = df['volume'].astype('int64')
+
+                rows = df[['date', 'open', 'high', 'low', 'close', 'volume']]
+
+                # One executemany + one commit: SQLAlchemy pages the VALUES
+                # lists itself (insertmanyvalues), so chunked commits would
+                # only add an fsync every 500 rows.
+                await db.execute(
+                    StockPrice.__table__.insert(),
+                    [
+                        {
+                            'symbol': symbol,
+                            'date': row_date,
+                            'open': open_,
+                            'high': high,
+                            'low': low,
+                            'close': close,
+                            'volume': volume,
+                            'status': 'OK',
+                        }
+                        for row_date, open_, high, low, close, volume
+                        in rows.itertuples(index=False, name=None)
+                    ],
+                )
+                count = len(rows)
+                await db.commit()
+
             logger.info(f"Loaded {count} records for {symbol}")
             return count
             
         except Exception as e:
             logger.error(f"Error loading data for {symbol}: {e}")
             await db.rollback()
-            return 0
-    
+            return None
+
+    @staticmethod
+    async def _load_symbols_concurrently(
+        symbols: List[str],
+        cutoff: Optional[pd.Timestamp],
+        checkpoint: Optional[set] = None
+    ) -> List[Optional[int]]:
+        # The per-symbol work is IO-bound (CSV read plus a few queries),
+        # so fan out across the pool; the semaphore keeps the task count
+        # below pool_size + max_overflow so no task stalls on checkout.
+        semaphore = asyncio.Semaphore(16)
+
+        async def worker(symbol: str) -> Optional[int]:
+            async with semaphore:
+                count = await StockDataService.load_stock_data_from_csv(symbol, cutoff)
+            # Only checkpoint symbols that actually loaded (or verified as
+            # up to date); a failed load must stay pending so the next
+            # restart retries it instead of skipping it forever.
+            if checkpoint is not None and count is not None:
+                checkpoint.add(symbol)
+                # Flush in batches so 500 symbols don't mean 500 writes
+                if len(checkpoint) % 50 == 0:
+                    _write_checkpoint(checkpoint)
+            return count
+
+        counts = await asyncio.gather(*(worker(s) for s in symbols))
+
+        if checkpoint is not None and symbols:
+            _write_checkpoint(checkpoint)
+
+        return counts
+
     @staticmethod
-    async def load_all_tracked_stocks(db: AsyncSession, days: Optional[int] = None):
+    async def load_all_tracked_stocks(days: Optional[int] = None):
         logger.info(f"Loading historical data for {len(TRACKED_STOCKS)} tracked stocks (days={'all' if days is None else days})...")
-        
-        total_loaded = 0
-        for symbol in TRACKED_STOCKS:
-            count = await StockDataService.load_stock_data_from_csv(db, symbol, days)
-            total_loaded += count
-        
-        logger.info(f"Finished loading {total_loaded} total records for tracked stocks")
-    
+
+        # One cutoff for the whole batch instead of a fresh datetime.now()
+        # per symbol; every worker filters against the same timestamp.
+        cutoff = _cutoff_for(days)
+        counts = await StockDataService._load_symbols_concurrently(TRACKED_STOCKS, cutoff)
+
+        logger.info(f"Finished loading {sum(c for c in counts if c)} total records for tracked stocks")
+
     @staticmethod
-    async def load_all_available_stocks(db: AsyncSession, days: Optional[int] = None):
-        dataset_dir = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks"
-        
-        if not dataset_dir.exists():
-            logger.error(f"Dataset directory not found: {dataset_dir}")
+    async def load_all_available_stocks(days: Optional[int] = None):
+        if not _DATASET_DIR.exists():
+            logger.error(f"Dataset directory not found: {_DATASET_DIR}")
             return
-        
-        csv_files = list(dataset_dir.glob("*.csv"))
-        symbols = sorted([f.stem for f in csv_files])
-        
-        logger.info(f"Loading historical data for ALL {len(symbols)} stocks (days={'all' if days is None else days})...")
-        
-        total_loaded = 0
-        loaded_count = 0
-        
-        for i, symbol in enumerate(symbols):
-            count = await StockDataService.load_stock_data_from_csv(db, symbol, days)
-            if count > 0:
-                total_loaded += count
-                loaded_count += 1
-            
-            if (i + 1) % 100 == 0:
-                logger.info(f"Progress: {i + 1}/{len(symbols)} stocks processed, {total_loaded} records loaded")
-        
-        logger.info(f"Finished loading {total_loaded} total records for {loaded_count} stocks")
+
+        symbols = list(_list_symbols())
+
+        # Resume from the checkpoint: symbols finished by an earlier run
+        # are skipped entirely; the MAX(date) probe still protects the
+        # rest if the checkpoint is stale or missing.
+        loaded = _read_checkpoint()
+        pending = [s for s in symbols if s not in loaded]
+        if len(pending) < len(symbols):
+            logger.info(f"Checkpoint: {len(symbols) - len(pending)} symbols already loaded, skipping")
+
+        logger.info(f"Loading historical data for {len(pending)} of {len(symbols)} stocks (days={'all' if days is None else days})...")
+
+        counts = await StockDataService._load_symbols_concurrently(pending, _cutoff_for(days), checkpoint=loaded)
+
+        total_loaded = sum(c for c in counts if c)
+        loaded_count = sum(1 for c in counts if c)
+        failed_count = sum(1 for c in counts if c is None)
+        logger.info(f"Finished loading {total_loaded} total records for {loaded_count} stocks"
+                    + (f" ({failed_count} failed, left pending)" if failed_count else ""))
     
     @staticmethod
     async def update_stock_prices(db: AsyncSession):
@@ -166,31 +353,27 @@ class StockDataService:
             result = await db.execute(query)
             tracked_stocks = result.scalars().all()
             
-            dataset_dir = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks"
-            
             updated_count = 0
             for tracked in tracked_stocks:
                 symbol = tracked.symbol
-                csv_path = dataset_dir / f"{symbol}.csv"
+                csv_path = _DATASET_DIR / f"{symbol}.csv"
                 
                 if not csv_path.exists():
                     logger.warning(f"CSV file not found for {symbol}")
                     continue
                 
                 try:
-                    df = pd.read_csv(csv_path)
-                    df.columns = df.columns.str.lower()
-                    
-                    if df.empty:
+                    latest = await asyncio.to_thread(_tail_row, csv_path)
+
+                    if not latest:
                         continue
-                    
-                    latest = df.iloc[-1]
-                    date_str = pd.to_datetime(latest['date']).strftime('%Y-%m-%d')
-                    
+
+                    trading_date = pd.to_datetime(latest['date']).date()
+
                     # Check if this date already exists
                     query = select(StockPrice).where(
                         StockPrice.symbol == symbol,
-                        StockPrice.date == date_str
+                        StockPrice.date == trading_date
                     )
                     result = await db.execute(query)
                     existing = result.scalar_one_or_none()
@@ -201,16 +384,16 @@ class StockDataService:
                         existing.high = float(latest['high'])
                         existing.low = float(latest['low'])
                         existing.close = float(latest['close'])
-                        existing.volume = int(latest.get('volume', 1000000))
+                        existing.volume = int(float(latest.get('volume') or 1000000))
                     else:
                         stock_price = StockPrice(
                             symbol=symbol,
-                            date=date_str,
+                            date=trading_date,
                             open=float(latest['open']),
                             high=float(latest['high']),
                             low=float(latest['low']),
                             close=float(latest['close']),
-                            volume=int(latest.get('volume', 1000000)),
+                            volume=int(float(latest.get('volume') or 1000000)),
                             status='OK'
                         )
                         db.add(stock_price)
@@ -230,48 +413,70 @@ class StockDataService:
     
     @staticmethod
     async def get_current_prices(db: AsyncSession, symbols: List[str]) -> Dict[str, float]:
-        prices = {}
-        
-        for symbol in symbols:
-            try:
-                query = select(StockPrice).where(
-                    StockPrice.symbol == symbol
-                ).order_by(StockPrice.date.desc()).limit(1)
-                
-                result = await db.execute(query)
-                stock_price = result.scalar_one_or_none()
-                
-                if stock_price:
-                    prices[symbol] = stock_price.close
+        if not symbols:
+            return {}
+
+        prices: Dict[str, float] = {}
+
+        try:
+            # One DISTINCT ON query returns the latest close per symbol,
+            # walking the (symbol, date DESC) index instead of N round trips.
+            query = (
+                select(StockPrice.symbol, StockPrice.close)
+                .where(StockPrice.symbol.in_(symbols))
+                .distinct(StockPrice.symbol)
+                .order_by(StockPrice.symbol, StockPrice.date.desc())
+            )
+            result = await db.execute(query)
+            prices = {row.symbol: float(row.close) for row in result.all()}
+        except Exception as e:
+            logger.error(f"Error getting prices for {symbols}: {e}")
+
+        # Fall back to the dataset files for symbols without DB rows; the
+        # reads run on worker threads, so gather them instead of awaiting
+        # one file at a time.
+        missing = [s for s in symbols if s not in prices]
+        if missing:
+            csv_prices = await asyncio.gather(
+                *(StockDataService._get_price_from_csv(s) for s in missing)
+            )
+            for symbol, csv_price in zip(missing, csv_prices):
+                if csv_price:
+                    prices[symbol] = csv_price
                 else:
-                    csv_price = await StockDataService._get_price_from_csv(symbol)
-                    if csv_price:
-                        prices[symbol] = csv_price
-                    else:
-                        logger.warning(f"No price data found for {symbol}")
-                    
-            except Exception as e:
-                logger.error(f"Error getting price for {symbol}: {e}")
-        
+                    logger.warning(f"No price data found for {symbol}")
+
         return prices
     
     @staticmethod
     async def _get_price_from_csv(symbol: str) -> Optional[float]:
         try:
-            csv_path = Path(__file__).parent.parent.parent / "dataset_of_stocks" / "stocks" / f"{symbol}.csv"
+            parquet_path = _PARQUET_DIR / f"{symbol}.parquet"
+            if parquet_path.exists():
+                # Only the close column of the last row group is decoded —
+                # the footer points straight at it — instead of scanning
+                # the whole file for one trailing value.
+                def _last_close() -> Optional[float]:
+                    pf = pq.ParquetFile(parquet_path)
+                    if pf.metadata.num_rows == 0:
+                        return None
+                    group = pf.read_row_group(pf.num_row_groups - 1, columns=['close'])
+                    return float(group.column('close')[-1].as_py())
+
+                return await asyncio.to_thread(_last_close)
+
+            csv_path = _DATASET_DIR / f"{symbol}.csv"
             if not csv_path.exists():
                 return None
-            
-            df = pd.read_csv(csv_path)
+
+            df = await asyncio.to_thread(pd.read_csv, csv_path)
             if df.empty:
                 return None
-            
+
             return float(df.iloc[-1]['close'])
         except Exception as e:
             logger.error(f"Error reading CSV for {symbol}: {e}")
             return None
-        
-        return prices
     
     @staticmethod
     async def get_historical_prices(
@@ -279,8 +484,8 @@ class StockDataService:
         symbol: str,
         days: int = 30
     ) -> List[Dict]:
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
+        cutoff_date = (datetime.now() - timedelta(days=days)).date()
+
         query = select(StockPrice).where(
             StockPrice.symbol == symbol,
             StockPrice.date >= cutoff_date
@@ -304,16 +509,22 @@ class StockDataService:
     @staticmethod
     async def get_stock_statistics(db: AsyncSession) -> Dict:
         try:
-            # Count total records
-            total_query = select(func.count(StockPrice.id))
-            total_result = await db.execute(total_query)
+            # The two counts are independent; running the second on its
+            # own session lets both scans overlap instead of paying the
+            # latencies back-to-back.
+            async def _tracked_count() -> int:
+                async with async_session_maker() as session:
+                    result = await session.execute(
+                        select(func.count(TrackedStock.id)).where(TrackedStock.is_active == True)
+                    )
+                    return result.scalar()
+
+            total_result, tracked_count = await asyncio.gather(
+                db.execute(select(func.count(StockPrice.id))),
+                _tracked_count(),
+            )
             total_count = total_result.scalar()
-            
-            # Count tracked stocks
-            tracked_query = select(func.count(TrackedStock.id)).where(TrackedStock.is_active == True)
-            tracked_result = await db.execute(tracked_query)
-            tracked_count = tracked_result.scalar()
-            
+
             return {
                 'total_price_records': total_count,
                 'tracked_stocks': tracked_count,
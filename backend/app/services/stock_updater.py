@@ -42,8 +42,9 @@ async def initialize_stock_data():
         async with async_session_maker() as db:
             await stock_data_service.initialize_tracked_stocks(db)
 
-            await stock_data_service.load_all_available_stocks(db, days=None)
-        
+        # Fans out across per-symbol sessions, so it runs outside this one
+        await stock_data_service.load_all_available_stocks(days=None)
+
         logger.info("Stock data initialization completed")
         
     except Exception as e:
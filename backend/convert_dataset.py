@@ -0,0 +1,65 @@
+"""One-shot conversion of the stock CSV dataset to Parquet.
+
+Columnar Parquet lets the services read just the columns they need (the
+latest-close lookup touches one column of one row group instead of
+scanning a whole CSV) and loads decompress several times faster than
+text parsing. Run once after downloading the dataset:
+
+    python convert_dataset.py
+"""
+
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def convert_all(stocks_dir: Path, parquet_dir: Path) -> None:
+    parquet_dir.mkdir(parents=True, exist_ok=True)
+
+    csv_files = sorted(stocks_dir.glob("*.csv"))
+    logger.info(f"Converting {len(csv_files)} CSV files to Parquet...")
+
+    converted = 0
+    for i, csv_path in enumerate(csv_files):
+        out_path = parquet_dir / f"{csv_path.stem}.parquet"
+
+        # Skip files already converted from an earlier run
+        if out_path.exists() and out_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            continue
+
+        try:
+            df = pd.read_csv(csv_path)
+            # Normalize once at conversion time so readers skip it
+            df.columns = df.columns.str.lower()
+            df['date'] = pd.to_datetime(df['date'])
+            df = df.sort_values('date')
+            df.to_parquet(out_path, engine='pyarrow', compression='snappy', index=False)
+            converted += 1
+        except Exception as e:
+            logger.error(f"Error converting {csv_path.name}: {e}")
+            continue
+
+        if (i + 1) % 500 == 0:
+            logger.info(f"Progress: {i + 1}/{len(csv_files)} files processed")
+
+    logger.info(f"Converted {converted} files to {parquet_dir}")
+
+
+def main():
+    current_dir = Path(__file__).parent
+    stocks_dir = current_dir / "dataset_of_stocks" / "stocks"
+    parquet_dir = current_dir / "dataset_of_stocks" / "stocks_parquet"
+
+    if not stocks_dir.exists():
+        logger.error(f"Stocks directory not found: {stocks_dir}")
+        return
+
+    convert_all(stocks_dir, parquet_dir)
+
+
+if __name__ == "__main__":
+    main()